@@ -3,69 +3,307 @@ Agent node implementations for the multi-agent travel planning system.
 Each agent has specific responsibilities and can handle interruptions gracefully.
 """
 
-from typing import Any
+from typing import Any, Mapping
+from types import MappingProxyType
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
-from state import AgentState
-import json
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from pydantic import ValidationError
+from state import AgentState, RoutingDecision
+from extract import extract_route
+from tools import (
+    booking_search_destination,
+    booking_search_hotels,
+    get_attraction_details,
+    search_attractions,
+    search_flights,
+    web_search,
+)
+import asyncio
+from functools import lru_cache
+import orjson
 import time
 import re
+import reprlib
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Bounded repr for logging payloads we don't have raw bytes for
+_LOG_REPR = reprlib.Repr()
+_LOG_REPR.maxlevel = 4
+_LOG_REPR.maxstring = 200
+_LOG_REPR.maxother = 200
+_LOG_REPR.maxdict = 8
+_LOG_REPR.maxlist = 8
 
 # Load env early
 load_dotenv()
 project_root = Path(__file__).resolve().parents[1]
 load_dotenv(project_root / ".env.local", override=False)
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-lite",
-    temperature=0,
-    streaming=True,
-    google_api_key=os.getenv("GOOGLE_API_KEY")
+# Coordinator intent -> specialist node
+_NEXT_AGENT: Mapping[str, str] = MappingProxyType({
+    "flight": "flight_agent",
+    "hotel": "hotel_agent",
+    "attraction": "attractions_agent",
+    "general": "research_agent",
+    "both": "flight_agent",  # Start with flights, hotel will be chained
+})
+
+# Precompiled patterns shared across invocations
+_JSON_OBJECT_RE = re.compile(r"\{[\s\S]*\}")
+_INTENT_FIELD_RE = re.compile(r'"intent"\s*:\s*"(?:flight|hotel|attraction|general|both)"', re.IGNORECASE)
+_REASONING_KEY_RE = re.compile(r',\s*"reasoning"\s*:')
+_WHITESPACE_RE = re.compile(r"\s+")
+_JSON_ARRAY_RE = re.compile(r"\[[\s\S]*\]")
+_SUB_QUERY_SPLIT_RE = re.compile(r"\s+and\s+|[,;?]", re.IGNORECASE)
+_MAX_SUB_QUERIES = 3
+_RESEARCH_HEADER = "🔍 Here's what I found about your travel query:\n\n"
+_ISO_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+# "... in/at/near <place>", the place ending at punctuation or a trailing
+# date/duration clause ("hotels in Paris for 3 nights" -> "paris"). Phrases
+# starting with a digit, month, weekday, season or time of day are dates, not
+# places ("hotels in Paris in december" -> "paris")
+_NOT_A_PLACE = (
+    r"(?!(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+    r"|(?:mon|tues|wednes|thurs|fri|satur|sun)day|spring|summer|autumn|fall|winter"
+    r"|the\s+(?:morning|afternoon|evening|night))\b)"
+)
+_LOCATION_RE = re.compile(
+    r"\b(?:in|at|near)\s+(?=[^\W\d])" + _NOT_A_PLACE + r"([^\n,;?!]+?)"
+    r"(?=\s+(?:in|at|near|for|from|on|with|under|between|during|this|next|tomorrow|today)\b|\.?\s*(?:[\n,;?!]|$))"
 )
 
 
-async def coordinator_agent(state: AgentState) -> dict[str, Any]:
+@lru_cache(maxsize=16)
+def _utc_date_for_day(day: int, offset_days: int) -> str:
+    return (datetime.fromtimestamp(day * 86400, timezone.utc) + timedelta(days=offset_days)).strftime("%Y-%m-%d")
+
+
+def _utc_date(offset_days: int = 0) -> str:
+    """UTC date ``offset_days`` from today as YYYY-MM-DD, formatted once per day."""
+    # Epoch seconds // 86400 is the UTC day number, so the cache rolls over at midnight UTC
+    return _utc_date_for_day(int(time.time()) // 86400, offset_days)
+
+
+def _extract_location(state: AgentState, default: str) -> str:
     """
-    Coordinator Agent: Main orchestrator that analyzes user intent and routes to specialists.
-    
-    Responsibilities:
-    - Analyze user queries to detect intent (flight, hotel, attractions, general info)
-    - Route requests to appropriate specialized agents
-    - Handle seamless handoffs between agents
-    - Manage interruption context
+    Pick the city a hotel/attraction query is about.
     
-    Inputs: User query, conversation history
-    Outputs: Routing decision, detected intents, coordinator message
+    Uses the last "in/at/near <place>" of the query, then the coordinator's
+    extracted destination/origin, then the whole query, then ``default``.
+    Date phrases never count as the place:
+
+        "hotels in Paris in december"    -> "paris"
+        "hotels in Paris in March 2025"  -> "paris"
+        "hotels near the beach in Goa"   -> "goa"
     """
-    
-    # Check for interruption at entry
-    if state.get("should_interrupt", False):
-        return {
-            **state,
-            "status": "interrupted",
-            "is_interrupted": True,
-            "messages": state["messages"] + [
-                AIMessage(content=f"⏸️ Coordination interrupted: {state.get('interrupt_reason', 'User cancellation')}")
-            ]
-        }
-    
-    # Record agent activation
-    state["previous_agents"].append("coordinator")
-    state["agent_actions"].append({
-        "agent": "coordinator",
-        "action": "analyzing_query",
-        "timestamp": time.time()
-    })
-    
-    # Build system prompt for intent detection
-    system_prompt = """You are a travel planning coordinator. Analyze the user's query and determine:
+    query_text = state.get("user_query", "")
+    matches = _LOCATION_RE.findall(query_text.lower())
+    if matches:
+        return matches[-1].strip()
+    details = state.get("coordinator_context", {}).get("extracted_details", {}) or {}
+    loc = details.get("destination") or details.get("origin")
+    if isinstance(loc, str) and loc.strip():
+        return loc
+    return query_text.strip() or default
+
+
+def _split_sub_queries(query: str) -> list[str]:
+    """
+    Split a compound research question into at most ``_MAX_SUB_QUERIES`` parts.
+
+    Parts that lost the shared place keep it: "weather in Tokyo and visa
+    requirements?" -> ["weather in Tokyo", "visa requirements in tokyo"].
+    """
+    parts = [p.strip() for p in _SUB_QUERY_SPLIT_RE.split(query)]
+    parts = [p for p in parts if len(p) > 2][:_MAX_SUB_QUERIES]
+    if len(parts) < 2:
+        return parts or [query]
+    places = [m[-1].strip() if (m := _LOCATION_RE.findall(p.lower())) else None for p in parts]
+    shared = next((place for place in reversed(places) if place), None)
+    if shared is None:
+        return parts
+    return [
+        p if place or shared in p.lower() else f"{p} in {shared}"
+        for p, place in zip(parts, places)
+    ]
+
+
+def _stay_dates(state: AgentState) -> tuple[str, str] | None:
+    """
+    Return (arrival, departure) when the user gave usable hotel dates.
+
+    Looks at the coordinator's checkin/checkout, then ISO dates in its "dates"
+    field or the query itself. A lone arrival date gets a two-night stay.
+    """
+    details = state.get("coordinator_context", {}).get("extracted_details", {}) or {}
+    found = [d for d in (details.get("checkin"), details.get("checkout")) if isinstance(d, str) and d]
+    if not found:
+        found = _ISO_DATE_RE.findall(str(details.get("dates") or "")) or _ISO_DATE_RE.findall(
+            state.get("user_query", "")
+        )
+    try:
+        arrival = date.fromisoformat(found[0])
+        departure = date.fromisoformat(found[1]) if len(found) > 1 else arrival + timedelta(days=2)
+    except (IndexError, ValueError):
+        return None
+    if arrival.isoformat() < _utc_date() or departure <= arrival:
+        return None
+    return arrival.isoformat(), departure.isoformat()
+
+
+def _price_parts(record: dict[str, Any]) -> tuple[Any, Any]:
+    """Return (value, currency) from a Booking priceBreakdown, tolerating missing levels."""
+    price_info = record.get("priceBreakdown")
+    if not isinstance(price_info, dict):
+        return None, None
+    gross = price_info.get("grossPrice")
+    if not isinstance(gross, dict):
+        return None, price_info.get("currency")
+    return gross.get("value"), gross.get("currency") or price_info.get("currency")
+
+
+_HOTEL_KEYS = ("hotels", "result", "items", "list", "searchResults", "properties")
+_ATTR_KEYS = ("attractions", "items", "results", "products")
+_SCAN_LIMIT = 8
+
+
+def _record_list(container: Any, keys: tuple[str, ...]) -> list | None:
+    """Pick the record list out of a Booking ``data`` object.
+
+    Known keys are probed in priority order; only unknown shapes fall back to a
+    scan over the first few values for a list of dicts.
+    """
+    if isinstance(container, list):
+        return container
+    if not isinstance(container, dict):
+        return None
+    for key in keys:
+        val = container.get(key)
+        if isinstance(val, list) and val:
+            return val
+    for _, val in zip(range(_SCAN_LIMIT), container.values()):
+        if isinstance(val, list) and val and isinstance(val[0], dict):
+            return val
+    return None
+
+
+def _normalize_hotel(h: Any) -> dict[str, Any] | None:
+    """Flatten one Booking hotel record into the card shape the UI renders."""
+    if not isinstance(h, dict):
+        return None
+    prop = h.get("property")
+    if not isinstance(prop, dict):
+        prop = h
+    value, currency = _price_parts(prop)
+    photos = prop.get("photos")
+    photo = photos[0] if isinstance(photos, list) and photos else None
+    return {
+        "name": prop.get("name") or h.get("name") or "Hotel",
+        "rating": prop.get("reviewScore") or prop.get("review_score"),
+        "price": {"amount": value, "currency": currency} if value else None,
+        "location": h.get("accessibilityLabel") or prop.get("address") or prop.get("city") or "",
+        "imageUrl": photo.get("url") if isinstance(photo, dict) else None,
+        "amenities": [],
+    }
+
+
+def _normalize_attraction(a: Any, location: str) -> dict[str, Any] | None:
+    """Flatten one Booking attraction record into the card shape the UI renders."""
+    if not isinstance(a, dict):
+        return None
+    info = a.get("property")
+    if not isinstance(info, dict):
+        info = a
+    value, currency = _price_parts(info)
+    photos = info.get("photoUrls")
+    return {
+        "name": info.get("name") or a.get("title") or "Attraction",
+        "rating": info.get("reviewScore") or info.get("rating"),
+        "reviews": info.get("reviewCount") or info.get("reviews"),
+        "price": {"amount": value, "currency": currency} if value else None,
+        "location": location,
+        "imageUrl": photos[0] if isinstance(photos, list) and photos else None,
+    }
+
+
+def _render_cards(items: list[Any], **groups: list[Any]) -> str:
+    """Serialize the ``{"items": ..., "<group>": ...}`` card block the chat UI parses."""
+    return _dumps({"items": items, **groups})
+
+
+def _as_float(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _attraction_bullet(card: dict[str, Any], duration: Any, desc: Any) -> str:
+    """Render one research-reply bullet from a normalized attraction card."""
+    rating, reviews, price = card["rating"], card["reviews"], card["price"]
+    parts = [f"• {card['name']}"]
+    if rating:
+        rating_f = _as_float(rating)
+        parts.append(f" | Rating: {rating_f:.1f}★" if rating_f is not None else f" | Rating: {rating}★")
+    if reviews:
+        parts.append(f" ({reviews} reviews)")
+    if price:
+        amount, cur = price["amount"], price["currency"] or "INR"
+        amount_f = _as_float(amount)
+        parts.append(f" | From approx. {amount_f:.0f} {cur}" if amount_f is not None else f" | From approx. {amount} {cur}")
+    if duration:
+        parts.append(f" | Duration: {duration}")
+    if desc:
+        parts.append(f"\n  {desc.strip()}")
+    return "".join(parts)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a JSON string with orjson (UTF-8 output, unknown types via str)."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Proactive throttling for the Gemini API: a cap on in-flight calls and an
+# optional requests-per-minute token bucket, so bursts queue briefly instead of
+# hitting 429s and retry backoff
+_LLM_SEM = asyncio.Semaphore(max(1, int(os.getenv("COORDINATOR_MAX_CONCURRENCY", "8"))))
+_LLM_RPM = float(os.getenv("COORDINATOR_RPM", "0"))
+
+# Initialize LLM. It only serves coordinator routing, so the model can be
+# swapped for a smaller/cheaper endpoint without touching the agents.
+llm = ChatGoogleGenerativeAI(
+    model=os.getenv("COORDINATOR_MODEL", "gemini-2.5-flash-lite"),
+    temperature=0,
+    streaming=True,
+    # JSON mode: Gemini constrains decoding to valid JSON (objects for single
+    # queries, arrays for micro-batches), so routing replies never need repair
+    response_mime_type="application/json",
+    google_api_key=os.getenv("GOOGLE_API_KEY"),
+    rate_limiter=(
+        InMemoryRateLimiter(requests_per_second=_LLM_RPM / 60, max_bucket_size=max(1.0, _LLM_RPM / 60))
+        if _LLM_RPM > 0
+        else None
+    ),
+)
+# Unary twin for whole-reply calls (micro-batches): with streaming explicitly
+# off, ainvoke stays a single request even under astream_events, and routing
+# JSON is not relayed to the client as token events. Shares the client and
+# rate limiter with llm, whose streaming is kept for early-stop routing.
+_llm_unary = llm.model_copy(update={"streaming": False})
+
+
+# Static system prompt for coordinator intent detection
+COORDINATOR_SYSTEM_PROMPT = """You are a travel planning coordinator. Analyze the user's query and determine:
 
 1. What type of assistance they need:
    - FLIGHT: Finding flights, booking flights, flight prices, schedules
@@ -94,140 +332,601 @@ Respond ONLY with valid JSON:
   },
   "reasoning": "brief explanation"
 }"""
+COORDINATOR_SYSTEM_MSG = SystemMessage(content=COORDINATOR_SYSTEM_PROMPT)
+
+
+_CONTEXT_TURN_CHARS = 400
+_CONTEXT_RESULT_PREVIEW = 120
+
+
+def _context_text(role: str, content: str) -> str:
+    """Text of one prior turn for the coordinator, masking long agent results."""
+    if len(content) <= _CONTEXT_TURN_CHARS:
+        return content
+    if role == "ai":
+        # Agent replies carry card JSON; the opening line says enough for routing
+        return f"[prior result: {content[:_CONTEXT_RESULT_PREVIEW]}...]"
+    return content[:_CONTEXT_TURN_CHARS]
+
+
+@lru_cache(maxsize=256)
+def _render_turns(turns: tuple[tuple[str, str], ...]) -> str:
+    """Render recent (role, content) turns for the coordinator context message."""
+    return "\n".join(f"{role}: {content}" for role, content in turns)
+
+
+# Gemini explicit context caching for the coordinator prompt. Opt-in, since
+# Gemini rejects caches below the model's minimum prompt size.
+_PROMPT_CACHE_ENABLED = os.getenv("GEMINI_PROMPT_CACHE", "0") == "1"
+_PROMPT_CACHE_TTL = os.getenv("GEMINI_PROMPT_CACHE_TTL", "3600s")
+_prompt_cache_name: str | None = None
+
+
+async def _coordinator_cache_name() -> str | None:
+    """Return the cached-content name for the coordinator prompt, creating it on first use."""
+    global _PROMPT_CACHE_ENABLED, _prompt_cache_name
+    if not _PROMPT_CACHE_ENABLED:
+        return None
+    if _prompt_cache_name is None:
+        try:
+            from google.genai import types
+
+            cache = await llm.client.aio.caches.create(
+                model=llm.model,
+                config=types.CreateCachedContentConfig(
+                    display_name="coordinator-system-prompt",
+                    system_instruction=COORDINATOR_SYSTEM_PROMPT,
+                    ttl=_PROMPT_CACHE_TTL,
+                ),
+            )
+            _prompt_cache_name = cache.name
+        except Exception as e:
+            # Don't retry on every request; fall back to sending the prompt inline
+            _PROMPT_CACHE_ENABLED = False
+            logger.warning("Coordinator prompt cache disabled: %s", e)
+    return _prompt_cache_name
+
+
+async def warmup_coordinator() -> None:
+    """Create the coordinator prompt cache ahead of the first query (no-op unless enabled)."""
+    await _coordinator_cache_name()
+
+
+def _routing_prefix(text: str) -> str | None:
+    """Return the routing JSON up to (not including) "reasoning", once intent and details are known."""
+    cut = _REASONING_KEY_RE.search(text)
+    if not cut or not _INTENT_FIELD_RE.search(text, 0, cut.start()):
+        return None
+    return text[:cut.start()] + "}"
+
+
+async def _generate_routing(messages: list, stop_early: bool, **kwargs: Any) -> Any:
+    """Run the coordinator model, optionally returning as soon as the routing fields are out."""
+    async with _LLM_SEM:
+        if not stop_early:
+            return await _llm_unary.ainvoke(messages, **kwargs)
+        # The prompt asks for intent and details before the free-text reasoning, so
+        # stop streaming once reasoning starts instead of waiting for the tail.
+        buf = ""
+        stream = llm.astream(messages, **kwargs)
+        try:
+            async for chunk in stream:
+                # .text is a property on langchain-core 1.x but a method on 0.3.x
+                text = chunk.text
+                buf += text if isinstance(text, str) else text()
+                prefix = _routing_prefix(buf)
+                if prefix:
+                    return AIMessage(content=prefix)
+        finally:
+            await stream.aclose()
+        return AIMessage(content=buf)
+
+
+async def _invoke_coordinator(turn_messages: list, stop_early: bool = False) -> Any:
+    """Invoke the coordinator LLM, referencing the cached system prompt when available."""
+    global _prompt_cache_name
+    cache_name = await _coordinator_cache_name()
+    if cache_name:
+        try:
+            return await _generate_routing(turn_messages, stop_early, cached_content=cache_name)
+        except Exception as e:
+            if "NOT_FOUND" not in str(e) and "404" not in str(e):
+                raise
+            # Cache expired server-side; recreate it on the next call
+            _prompt_cache_name = None
+    return await _generate_routing(
+        [COORDINATOR_SYSTEM_MSG, *turn_messages], stop_early
+    )
+
+
+def _parse_routing(response: Any) -> RoutingDecision | None:
+    """Parse the coordinator LLM response into a RoutingDecision, or None if malformed."""
+    if isinstance(response, str):
+        raw_text = response
+    elif hasattr(response, "content"):
+        raw_text = response.content
+    else:
+        raw_text = str(response)
+
+    # Decode straight into the narrow routing schema; extra keys are skipped
+    if isinstance(raw_text, str):
+        # Try to extract first JSON object from the text
+        match = _JSON_OBJECT_RE.search(raw_text)
+        if match:
+            try:
+                return RoutingDecision.model_validate_json(match.group(0))
+            except ValidationError:
+                return None
+    elif isinstance(raw_text, dict):
+        try:
+            return RoutingDecision.model_validate(raw_text)
+        except ValidationError:
+            return None
+    return None
+
+
+# Intent keywords for the fast-path router, compiled into one alternation so
+# a query is scanned once regardless of how many keywords there are
+_FAST_ROUTE_KEYWORDS: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    "flight": (
+        "flight", "flights", "fly", "flying", "airline", "airlines", "airport", "airfare", "plane",
+        "depart", "departing", "departure",
+    ),
+    "hotel": ("hotel", "hotels", "stay", "accommodation", "lodge", "hostel", "resort", "room", "rooms"),
+    "attraction": ("attraction", "attractions", "things to do", "places to visit", "sightseeing", "tour", "tours"),
+})
+_FAST_ROUTE_RE = re.compile(
+    r"(?P<flight>\b(?:" + "|".join(map(re.escape, _FAST_ROUTE_KEYWORDS["flight"])) + r")\b"
+    r"|(?-i:\b[A-Z]{3}\s+to\s+[A-Z]{3}\b))"
+    r"|(?P<hotel>\b(?:" + "|".join(map(re.escape, _FAST_ROUTE_KEYWORDS["hotel"])) + r")\b)"
+    r"|(?P<attraction>\b(?:" + "|".join(map(re.escape, _FAST_ROUTE_KEYWORDS["attraction"])) + r")\b)",
+    re.IGNORECASE,
+)
+_FAST_ROUTE_MIN_SCORE = 1
+# Greetings and bare help requests need no classification at all
+_SMALL_TALK_RE = re.compile(r"\s*(?:hi|hello|hey|help|thanks|thank you)\b[\s!.?]*", re.IGNORECASE)
+
+
+def _fast_route(query: str) -> RoutingDecision | None:
+    """Route without the LLM when only one intent's keywords appear in the query."""
+    if _SMALL_TALK_RE.fullmatch(query):
+        return RoutingDecision(intent="general", details={}, reasoning="Fast-path keyword routing")
+    scores = {"flight": 0, "hotel": 0, "attraction": 0}
+    for match in _FAST_ROUTE_RE.finditer(query):
+        scores[match.lastgroup] += 1
+    best = max(scores, key=scores.get)
+    if scores[best] < _FAST_ROUTE_MIN_SCORE:
+        return None
+    if any(score for intent, score in scores.items() if intent != best):
+        return None
+    return RoutingDecision(intent=best, details={}, reasoning="Fast-path keyword routing")
+
+
+def _keyword_intent(query: str) -> str:
+    """Best-effort intent from the fast-path keywords; flight beats hotel beats attraction."""
+    hits = {match.lastgroup for match in _FAST_ROUTE_RE.finditer(query)}
+    return next((intent for intent in ("flight", "hotel", "attraction") if intent in hits), "general")
+
+
+# Routing decisions keyed by (normalized query, previous intent)
+_ROUTE_CACHE: "OrderedDict[tuple[str, str | None], tuple[float, RoutingDecision]]" = OrderedDict()
+_ROUTE_CACHE_MAXSIZE = 2048
+_ROUTE_CACHE_TTL = 600  # seconds
+_ROUTE_LOCKS: dict[tuple[str, str | None], asyncio.Lock] = {}
+# Coroutines holding or waiting on each route lock
+_ROUTE_LOCK_USERS: dict[tuple[str, str | None], int] = {}
+
+
+@asynccontextmanager
+async def _route_lock(cache_key: tuple[str, str | None]):
+    """Serialize routing of one cache key; the lock is dropped once nobody holds or awaits it."""
+    lock = _ROUTE_LOCKS.setdefault(cache_key, asyncio.Lock())
+    _ROUTE_LOCK_USERS[cache_key] = _ROUTE_LOCK_USERS.get(cache_key, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        # A released lock looks free before its next waiter has woken, so
+        # dropping it on `not locked()` let a third caller start a parallel
+        # LLM call on a fresh lock; count the users instead
+        left = _ROUTE_LOCK_USERS.pop(cache_key) - 1
+        if left:
+            _ROUTE_LOCK_USERS[cache_key] = left
+        else:
+            del _ROUTE_LOCKS[cache_key]
+
+
+def _normalize_query(query: str) -> str:
+    return _WHITESPACE_RE.sub(" ", query.lower().strip())
+
+
+def _route_cache_get(key: tuple[str, str | None]) -> RoutingDecision | None:
+    item = _ROUTE_CACHE.get(key)
+    if not item:
+        return None
+    ts, decision = item
+    if time.time() - ts > _ROUTE_CACHE_TTL:
+        _ROUTE_CACHE.pop(key, None)
+        return None
+    _ROUTE_CACHE.move_to_end(key)
+    return decision
+
+
+def _route_cache_set(key: tuple[str, str | None], decision: RoutingDecision) -> None:
+    _ROUTE_CACHE[key] = (time.time(), decision)
+    _ROUTE_CACHE.move_to_end(key)
+    while len(_ROUTE_CACHE) > _ROUTE_CACHE_MAXSIZE:
+        _ROUTE_CACHE.popitem(last=False)
+
+
+class CoordBatcher:
+    """Coalesce concurrent coordinator routing calls into a single Gemini request.
+
+    Queries submitted within ``max_wait`` seconds of each other (up to
+    ``max_batch``) are sent as one numbered prompt and the model returns a JSON
+    array of routing decisions. A batch of one uses the normal single-shot call.
+    """
+
+    def __init__(self, max_batch: int = 8, max_wait: float = 0.015):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def submit(self, turn_messages: list) -> Any:
+        """Queue one query's coordinator messages and wait for its LLM response."""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((turn_messages, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            asyncio.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: list) -> None:
+        if len(batch) == 1:
+            turn_messages, future = batch[0]
+            await self._resolve(future, _invoke_coordinator(turn_messages, stop_early=True))
+            return
+
+        results = None
+        try:
+            response = await _invoke_coordinator([HumanMessage(content=self._batch_prompt(batch))])
+            results = self._split_response(response, len(batch))
+        except Exception as e:
+            logger.warning("Batched coordinator call failed: %s", e)
+
+        if results is None:
+            # Malformed or failed batch: route each query on its own
+            await asyncio.gather(*(self._resolve(f, _invoke_coordinator(m, stop_early=True)) for m, f in batch))
+            return
+        for (_, future), decision in zip(batch, results):
+            if not future.done():
+                future.set_result(AIMessage(content=_dumps(decision)))
+
+    @staticmethod
+    async def _resolve(future: asyncio.Future, call) -> None:
+        try:
+            result = await call
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _batch_prompt(batch: list) -> str:
+        lines = [
+            f"Route each query below and return a JSON array with exactly {len(batch)} "
+            "routing objects, in the same order, each using the JSON format above:"
+        ]
+        for i, (turn_messages, _) in enumerate(batch, 1):
+            lines.append(f"{i}) " + "\n   ".join(str(m.content) for m in turn_messages))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _split_response(response: Any, expected: int) -> list | None:
+        text = response.content if hasattr(response, "content") else str(response)
+        match = _JSON_ARRAY_RE.search(text) if isinstance(text, str) else None
+        if not match:
+            return None
+        try:
+            items = orjson.loads(match.group(0))
+        except orjson.JSONDecodeError:
+            return None
+        if not isinstance(items, list) or len(items) != expected:
+            return None
+        if not all(isinstance(item, dict) for item in items):
+            return None
+        return items
+
+
+_coord_batcher = CoordBatcher(
+    max_batch=int(os.getenv("COORDINATOR_MAX_BATCH", "8")),
+    max_wait=float(os.getenv("COORDINATOR_BATCH_WAIT_MS", "15")) / 1000,
+)
+
+
+async def coordinator_agent(state: AgentState) -> dict[str, Any]:
+    """
+    Coordinator Agent: Main orchestrator that analyzes user intent and routes to specialists.
     
-    # Prepare messages for LLM
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"User query: {state['user_query']}")
-    ]
+    Responsibilities:
+    - Analyze user queries to detect intent (flight, hotel, attractions, general info)
+    - Route requests to appropriate specialized agents
+    - Handle seamless handoffs between agents
+    - Manage interruption context
+    
+    Inputs: User query, conversation history
+    Outputs: Routing decision, detected intents, coordinator message
+    """
+    
+    # One wall-clock read per hop, shared by the audit trail and the context
+    now = time.time()
+
+    # Record agent activation (appended to the audit trail by the state reducers)
+    activation = {
+        "previous_agents": ["coordinator"],
+        "agent_actions": [{
+            "agent": "coordinator",
+            "action": "analyzing_query",
+            "timestamp": now
+        }],
+    }
     
+    # Prepare messages for LLM (the system prompt is added by _invoke_coordinator)
+    # Turn messages follow the static system prompt in a fixed order: prior
+    # conversation first, the fresh query last, so everything before the query
+    # is a stable prefix across turns.
+    messages = []
+
     # Add conversation history for context-aware routing
-    if len(state["messages"]) > 1:
+    # Only message text goes into the prompt, capped per turn; turns already
+    # contained in the query (usually the query itself) add nothing
+    turns = tuple(
+        (m.type, _context_text(m.type, content))
+        for m in state["messages"][-2:]
+        if (content := str(m.content)) not in state["user_query"]
+    )
+    if turns:
         messages.append(
-            HumanMessage(content=f"[Context] Previous conversation (last 2 turns): {state['messages'][-2:]}")
+            HumanMessage(content=f"[Context] Previous conversation (last 2 turns):\n{_render_turns(turns)}")
         )
+    messages.append(HumanMessage(content=f"User query: {state['user_query']}"))
     
-    # Get routing decision from LLM with graceful fallback on errors
-    try:
-        # Verify Google API key is properly loaded
-        import os
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if not google_api_key or google_api_key == 'YOUR_GOOGLE_API_KEY':
-            raise ValueError("GOOGLE_API_KEY is not properly set in environment variables")
+    # Reuse a recent routing decision for the same normalized query
+    cache_key = (
+        _normalize_query(state["user_query"]),
+        (state.get("coordinator_context") or {}).get("last_routing"),
+    )
+    # Unambiguous keyword queries skip the LLM entirely, so they take no lock
+    parsed = _fast_route(state["user_query"])
+    if parsed is None:
+        async with _route_lock(cache_key):
+            parsed = _route_cache_get(cache_key)
+            if parsed is None:
+                # Get routing decision from LLM with graceful fallback on errors
+                try:
+                    # Verify Google API key is properly loaded
+                    google_api_key = os.getenv('GOOGLE_API_KEY')
+                    if not google_api_key or google_api_key == 'YOUR_GOOGLE_API_KEY':
+                        raise ValueError("GOOGLE_API_KEY is not properly set in environment variables")
             
-        response = await llm.ainvoke(messages)
-    except Exception as e:
-        error_msg = f"⚠️ Coordinator model error: {str(e)[:200]}"
-        if "API key" in str(e):
-            error_msg = "⚠️ Google API key issue. Please check your GOOGLE_API_KEY in .env.local"
+                    response = await _coord_batcher.submit(messages)
+                except Exception as e:
+                    error_msg = f"⚠️ Coordinator model error: {str(e)[:200]}"
+                    if "API key" in str(e):
+                        error_msg = "⚠️ Google API key issue. Please check your GOOGLE_API_KEY in .env.local"
         
-        # Log the error
-        try:
-            logger = logging.getLogger(__name__)
-            logger.error(f"Coordinator LLM error: {str(e)}")
-        except Exception:
-            pass
+                    # Log the error
+                    logger.error("Coordinator LLM error: %s", e)
             
-        # Fallback to research agent with detailed message
-        fallback_msg = (
-            f"{error_msg}\n"
-            "🔍 Falling back to research agent for your query..."
-        )
+                    # Fallback to research agent with detailed message
+                    fallback_msg = (
+                        f"{error_msg}\n"
+                        "🔍 Falling back to research agent for your query..."
+                    )
         
-        # If this is an API key error, suggest checking the key
-        if "API key" in str(e):
-            fallback_msg += "\n\nℹ️ Note: Please ensure you've:"
-            fallback_msg += "\n1. Set a valid Google API key in .env.local"
-            fallback_msg += "\n2. Restarted your backend server after updating the key"
-            fallback_msg += "\n3. Enabled the Gemini API for your Google Cloud project"
+                    # If this is an API key error, suggest checking the key
+                    if "API key" in str(e):
+                        fallback_msg += "\n\nℹ️ Note: Please ensure you've:"
+                        fallback_msg += "\n1. Set a valid Google API key in .env.local"
+                        fallback_msg += "\n2. Restarted your backend server after updating the key"
+                        fallback_msg += "\n3. Enabled the Gemini API for your Google Cloud project"
         
-        return {
-            **state,
-            "current_agent": "coordinator",
-            "next_agent": "research_agent",
-            "detected_intents": ["general"],
-            "coordinator_context": {
-                "last_routing": "general",
-                "extracted_details": {},
-                "timestamp": time.time(),
-                "error": str(e),
-            },
-            "messages": state["messages"] + [AIMessage(content=fallback_msg)],
-            "status": "routed",
-        }
-
-    # Parse routing decision robustly
-    raw_text = None
-    if isinstance(response, str):
-        raw_text = response
-    elif hasattr(response, "content"):
-        raw_text = response.content
-    else:
-        raw_text = str(response)
+                    return {
+                        **activation,
+                        "current_agent": "coordinator",
+                        "next_agent": "research_agent",
+                        "detected_intents": ["general"],
+                        "coordinator_context": {
+                            "last_routing": "general",
+                            "extracted_details": {},
+                            "timestamp": now,
+                            "error": str(e),
+                        },
+                        "messages": [AIMessage(content=fallback_msg)],
+                        "status": "routed",
+                    }
+
+                parsed = _parse_routing(response)
+                if parsed is not None:
+                    _route_cache_set(cache_key, parsed)
 
     intent = "general"
     details: dict[str, Any] = {}
     reasoning = ""
 
-    parsed: Any = None
-    if isinstance(raw_text, str):
-        # Try to extract first JSON object from the text
-        match = re.search(r"\{[\s\S]*\}", raw_text)
-        if match:
-            try:
-                parsed = json.loads(match.group(0))
-            except Exception:
-                parsed = None
-    elif isinstance(raw_text, dict):
-        parsed = raw_text
-
-    if isinstance(parsed, dict):
-        intent = parsed.get("intent", "general")
-        details = parsed.get("details", {}) or {}
-        reasoning = parsed.get("reasoning", "")
+    if parsed is not None:
+        intent = parsed.intent or "general"
+        details = dict(parsed.details or {})  # cached decisions are shared
+        reasoning = parsed.reasoning or ""
     else:
         # Fallback to keyword-based routing
-        query_lower = state["user_query"].lower()
-        if any(word in query_lower for word in ["flight", "fly", "airline", "airport"]):
-            intent = "flight"
-        elif any(word in query_lower for word in ["hotel", "stay", "accommodation", "lodge"]):
-            intent = "hotel"
-        elif any(word in query_lower for word in ["attraction", "things to do", "places to visit", "sightseeing"]):
-            intent = "attraction"
-        else:
-            intent = "general"
+        intent = _keyword_intent(state["user_query"])
         details = {}
         reasoning = "Keyword-based fallback routing"
     
     # Determine next agent
-    next_agent_mapping = {
-        "flight": "flight_agent",
-        "hotel": "hotel_agent",
-        "attraction": "attractions_agent",
-        "general": "research_agent",
-        "both": "flight_agent"  # Start with flights, hotel will be chained
-    }
-    next_agent = next_agent_mapping.get(intent, "research_agent")
+    next_agent = _NEXT_AGENT.get(intent, "research_agent")
     
     # Build coordinator response
-    coordinator_message = f"🎯 I understand you're looking for {intent} assistance. {reasoning}. Routing to specialist..."
+    # Reasoning is empty when routing came from the fast path or an early-stopped stream
+    reasoning_text = f" {reasoning.rstrip('.')}." if reasoning else ""
+    coordinator_message = f"🎯 I understand you're looking for {intent} assistance.{reasoning_text} Routing to specialist..."
     
     # Update state
     return {
-        **state,
+        **activation,
         "current_agent": "coordinator",
         "next_agent": next_agent,
         "detected_intents": [intent],
         "coordinator_context": {
             "last_routing": intent,
             "extracted_details": details,
-            "timestamp": time.time()
+            "timestamp": now
         },
-        "messages": state["messages"] + [AIMessage(content=coordinator_message)],
+        "messages": [AIMessage(content=coordinator_message)],
         "status": "routed"
     }
 
 
+def _flight_option(opt: Any, from_id: str, to_id: str) -> tuple[dict[str, Any], str | None]:
+    """Card item plus a short summary line (None if nothing useful) for one flight offer."""
+    price = currency = airline = depart_time = arrive_time = duration = stops = raw_segments = None
+    if isinstance(opt, dict):
+        # price fields: read each container once
+        price_field = opt.get("price")
+        pricing_field = opt.get("pricing")
+        price_obj = price_field if isinstance(price_field, dict) else {}
+        pricing_obj = pricing_field if isinstance(pricing_field, dict) else {}
+        price = (
+            (price_field if isinstance(price_field, (int, float, str)) else None)
+            or price_obj.get("amount")
+            or pricing_obj.get("total")
+        )
+        currency = opt.get("currency") or price_obj.get("currency") or pricing_obj.get("currency")
+        # carrier/segments
+        raw_segments = opt.get("segments")
+        segments = raw_segments or opt.get("legs") or opt.get("itinerarySegments")
+        if isinstance(segments, list) and segments:
+            first_seg = segments[0]
+            last_seg = segments[-1]
+            if isinstance(first_seg, dict):
+                airline = first_seg.get("carrier") or first_seg.get("airline") or first_seg.get("marketingCarrier")
+                depart_time = first_seg.get("departureTime") or first_seg.get("departure") or first_seg.get("departureDateTime")
+            if isinstance(last_seg, dict):
+                arrive_time = last_seg.get("arrivalTime") or last_seg.get("arrival") or last_seg.get("arrivalDateTime")
+            stops = max(0, len(segments) - 1)
+        duration = opt.get("duration") or opt.get("totalDuration")
+
+    card = {
+        "airline": airline or "",
+        "price": price if isinstance(price, (int, float, str)) else (
+            {"amount": price.get("amount") or price.get("units"), "currency": currency or price.get("currency") or price.get("currencyCode")}
+            if isinstance(price, dict) else None
+        ),
+        "currency": currency or "",
+        "from": from_id,
+        "to": to_id,
+        "departTime": depart_time or "",
+        "arriveTime": arrive_time or "",
+        "duration": duration or "",
+        "stops": stops,
+        "segments": raw_segments,
+    }
+
+    parts = []
+    if airline:
+        parts.append(f"{airline} ")
+    if price:
+        parts.append(f"{price} {currency}" if currency else f"{price}")
+    if depart_time or arrive_time:
+        parts.append(f" | {depart_time or ''} → {arrive_time or ''}")
+    if duration:
+        parts.append(f" | {duration}")
+    if stops is not None:
+        parts.append(f" | Stops: {stops}")
+    return card, ("• " + "".join(parts) if parts else None)
+
+
+def _airline_option(al: dict[str, Any], from_id: str, to_id: str) -> dict[str, Any]:
+    """Card item synthesized from an aggregation airline entry when no offers were listed."""
+    mp = al.get("minPricePerAdult") or al.get("minPrice") or {}
+    price_obj = None
+    currency = None
+    if isinstance(mp, dict):
+        currency = mp.get("currencyCode") or mp.get("currency")
+        price_obj = {"amount": mp.get("units") or mp.get("amount"), "currency": currency}
+    return {
+        "airline": al.get("name") or al.get("iataCode") or "",
+        "airlineCode": al.get("iataCode"),
+        "logoUrl": al.get("logoUrl"),
+        "count": al.get("count"),
+        "price": price_obj,
+        "currency": currency or "",
+        "from": from_id,
+        "to": to_id,
+        "departTime": "",
+        "arriveTime": "",
+        "duration": "",
+        "stops": None,
+        "segments": None,
+    }
+
+
+async def _destination_hotel_cards(city: str, arrival_date: str, departure_date: str) -> list[dict[str, Any]]:
+    """Hotel cards at a flight's destination, appended to the flight reply."""
+    dest_res = await booking_search_destination.ainvoke({"query": city})
+    if dest_res.get("status") != "success":
+        return []
+    dest_payload = dest_res.get("results", {})
+    data_field = dest_payload.get("data") if isinstance(dest_payload, dict) else None
+    if not isinstance(data_field, list) or not data_field:
+        return []
+    first = data_field[0]
+    dest_id = first.get("dest_id") or first.get("id") or first.get("destination_id")
+    if not dest_id:
+        return []
+    hotels_res = await booking_search_hotels.ainvoke({
+        "dest_id": int(dest_id) if str(dest_id).lstrip("-").isdigit() else dest_id,
+        "search_type": first.get("search_type") or first.get("type") or "CITY",
+        "arrival_date": arrival_date,
+        "departure_date": departure_date,
+        "adults": 1,
+        "room_qty": 1,
+        "page_number": 1,
+        "units": "metric",
+        "temperature_unit": "c",
+        "languagecode": "en-us",
+        "currency_code": "USD",
+        "location": "US",
+    })
+    if hotels_res.get("status") != "success":
+        return []
+    h_payload = hotels_res.get("results", {})
+    root = h_payload.get("data") if isinstance(h_payload, dict) else None
+    hotels_list = _record_list(root, _HOTEL_KEYS)
+    if not isinstance(hotels_list, list):
+        return []
+    return [_normalize_hotel(h) for h in hotels_list[:6] if isinstance(h, dict)]
+
+
 async def flight_agent(state: AgentState) -> dict[str, Any]:
     """
     Flight Agent: Specialized agent for flight searches and bookings.
@@ -242,194 +941,84 @@ async def flight_agent(state: AgentState) -> dict[str, Any]:
     Outputs: Flight search results, formatted for display
     """
     
-    # Check for interruption
-    if state.get("should_interrupt", False):
-        # Preserve any partial results
-        state["partial_results"]["flights"] = "Search interrupted before completion"
-        return {
-            **state,
-            "status": "interrupted",
-            "is_interrupted": True,
-            "messages": state["messages"] + [
-                AIMessage(content="✈️ Flight search was interrupted. Partial results saved.")
-            ]
-        }
-    
-    # Record agent activation
-    state["previous_agents"].append("flight_agent")
-    state["active_tool_calls"].append("search_flights")
+    # Record agent activation (appended to the audit trail by the state reducers)
+    activation = {
+        "previous_agents": ["flight_agent"],
+        "active_tool_calls": ["search_flights"],
+    }
     
-    # Import tools here to avoid circular dependency
-    from tools import search_flights
-
-    # Aggregate parameters from entire conversation history
-    human_texts = []
-    for m in state.get("messages", []):
-        try:
-            if isinstance(m, HumanMessage):
-                human_texts.append(m.content if hasattr(m, "content") else str(m))
-        except Exception:
-            continue
-    # Include current query explicitly
-    human_texts.append(state.get("user_query", ""))
-    history_text = " \n".join([t for t in human_texts if isinstance(t, str)])
-
-    # Ensure current raw query is defined for parsing below
+    # Aggregate parameters from entire conversation history, current query last
     raw_query = state.get("user_query", "")
+    history_text = " \n".join([
+        *(m.content for m in state.get("messages", ()) if isinstance(m, HumanMessage) and isinstance(m.content, str)),
+        raw_query,
+    ])
+
+    # Resolve route and date in one pass over the conversation
+    from_id, to_id, depart_date, assumed = extract_route(
+        history_text, raw_query, state.get("from"), state.get("to")
+    )
 
-    # Patterns
-    date_pattern = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
-    explicit_id_pattern = re.compile(r"\b[A-Z]{3}\.(?:AIRPORT|CITY)\b")
-    iata_pattern = re.compile(r"\b[A-Z]{3}\b")
-
-    # Extract explicit fromId/toId prioritizing the most recent user query
-    from_id = None
-    to_id = None
-    # 1) Parse current raw_query first (highest priority)
-    current_explicit = explicit_id_pattern.findall(raw_query)
-    current_tokens = re.findall(r"\b[A-Z]{3}\.(?:AIRPORT|CITY)\b", raw_query)
-    if len(current_tokens) >= 1:
-        from_id = current_tokens[0]
-    if len(current_tokens) >= 2:
-        to_id = current_tokens[1]
-    # Try simple 'X to Y' in current query for IATA codes
-    if not (from_id and to_id):
-        m_cur = re.search(r"from\s+([A-Za-z\s]+?)\s+to\s+([A-Za-z\s]+)", raw_query, flags=re.IGNORECASE)
-        if m_cur:
-            cf = m_cur.group(1).strip().upper()
-            ct = m_cur.group(2).strip().upper()
-            if re.fullmatch(r"[A-Z]{3}", cf):
-                from_id = from_id or (cf + ".AIRPORT")
-            if re.fullmatch(r"[A-Z]{3}", ct):
-                to_id = to_id or (ct + ".AIRPORT")
-
-    # 2) Fall back to conversation history if still missing
-    if not (from_id and to_id):
-        explicit_ids = explicit_id_pattern.findall(history_text)
-        hist_tokens = re.findall(r"\b[A-Z]{3}\.(?:AIRPORT|CITY)\b", history_text)
-        if not from_id and len(hist_tokens) >= 1:
-            from_id = hist_tokens[0]
-        if not to_id and len(hist_tokens) >= 2:
-            to_id = hist_tokens[1]
-
-    # If missing, try to infer from "X to Y" phrasing with IATA codes
-    if not (from_id and to_id):
-        # Simple from/to pattern in history
-        m_from_to = re.search(r"from\s+([A-Za-z\s]+?)\s+to\s+([A-Za-z\s]+)", history_text, flags=re.IGNORECASE)
-        if m_from_to:
-            cand_from = m_from_to.group(1).strip()
-            cand_to = m_from_to.group(2).strip()
-            if re.fullmatch(r"[A-Z]{3}", cand_from.upper()) and not from_id:
-                from_id = cand_from.upper() + ".AIRPORT"
-            if re.fullmatch(r"[A-Z]{3}", cand_to.upper()) and not to_id:
-                to_id = cand_to.upper() + ".AIRPORT"
-
-    # If still missing, use any standalone IATA codes (take first two order of appearance)
-    if not (from_id and to_id):
-        iatas = [tok for tok in iata_pattern.findall(history_text) if len(tok) == 3 and tok.isupper()]
-        # Filter out common words accidentally in caps
-        common = {"USA", "THE", "AND"}
-        iatas = [x for x in iatas if x not in common]
-        if not from_id and len(iatas) >= 1:
-            from_id = iatas[0] + ".AIRPORT"
-        if not to_id and len(iatas) >= 2:
-            to_id = iatas[1] + ".AIRPORT"
-
-    # Map common city names to CITY codes if present in text
-    city_aliases = {
-        "new york": "NYC.CITY",
-        "mumbai": "BOM.AIRPORT",
-        "bombay": "BOM.AIRPORT",
-        "delhi": "DEL.AIRPORT",
-        "new delhi": "DEL.AIRPORT",
-        "london": "LON.CITY",
-        "paris": "PAR.CITY",
-    }
-    lower_text = history_text.lower()
-    for name, code in city_aliases.items():
-        if name in lower_text:
-            # If destination not set, prefer to assign to_id
-            if not to_id:
-                to_id = code
-            elif not from_id:
-                from_id = code
-
-    # Extract date
-    date_match = date_pattern.search(history_text)
-    depart_date = date_match.group(0) if date_match else None
-
-    # Validate and set airport codes
-    assumed = []
-    
-    # If we have IATA codes, ensure they're in the correct format
-    if not from_id and 'from' in state:
-        from_id = f"{state['from']}.AIRPORT"
-    if not to_id and 'to' in state:
-        to_id = f"{state['to']}.AIRPORT"
-    
-    # If still missing, try to extract from the query
-    if not from_id or not to_id:
-        # Try to extract airport codes from the query using regex
-        query = state.get('query', '').lower()
-        
-        # Look for patterns like "from ABC to XYZ" or "ABC to XYZ"
-        match = re.search(r'(?:from\s+)?([a-z]{3})\s+(?:to|2|\-)\s+([a-z]{3})', query)
-        if match:
-            if not from_id:
-                from_id = f"{match.group(1).upper()}.AIRPORT"
-            if not to_id:
-                to_id = f"{match.group(2).upper()}.AIRPORT"
-    
-    # If still missing, use the first available code for the missing one
-    if from_id and not to_id:
-        to_id = f"{state.get('to', 'BOM')}.AIRPORT"
-    elif to_id and not from_id:
-        from_id = f"{state.get('from', 'BOM')}.AIRPORT"
-    elif not from_id and not to_id:
-        # If we still don't have both, use the ones from the query or default to BOM-DEL
-        from_id = f"{state.get('from', 'BOM')}.AIRPORT"
-        to_id = f"{state.get('to', 'DEL')}.AIRPORT"
-        assumed.append(f"Using default route: {from_id} to {to_id}")
-    
     # Log the final values
-    if from_id and to_id:
-        logging.info(f"Flight search: {from_id} -> {to_id} on {depart_date}")
+    logger.info("Flight search: %s -> %s on %s", from_id, to_id, depart_date)
     if not depart_date:
-        depart_date = (datetime.utcnow() + timedelta(days=21)).strftime("%Y-%m-%d")
+        depart_date = _utc_date(21)
         assumed.append(f"departDate={depart_date}")
+    # Parse once; the hotel chain derives its check-out date from it
+    try:
+        depart_dt: date | None = date.fromisoformat(depart_date)
+    except ValueError:
+        depart_dt = None
     
     # Call flight search tool with interruption check
     interruption_context = {
         "should_interrupt": state.get("should_interrupt", False),
         "partial_results": state.get("partial_results", {})
     }
-    
-    flight_results = await search_flights.ainvoke({
-        "origin": from_id,
-        "destination": to_id,
-        "date": depart_date,
-        "interruption_check": interruption_context
-    })
+
+    # The chained hotel search (destination lookup + hotels, check-out 2 nights
+    # after departure) only depends on to_id and the date, so run it
+    # concurrently with the flight search instead of after it. It is only
+    # awaited once the flights succeed; otherwise it is cancelled.
+    dest_query = to_id.split(".")[0] if to_id else ""
+    departure_hotel = (depart_dt + timedelta(days=2)).isoformat() if depart_dt else depart_date
+    hotels_task = asyncio.create_task(_destination_hotel_cards(dest_query, depart_date, departure_hotel))
+    # Don't leave an unretrieved exception behind if the cards end up unused
+    hotels_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        flight_results = await search_flights.ainvoke({
+            "origin": from_id,
+            "destination": to_id,
+            "date": depart_date,
+            "interruption_check": interruption_context
+        })
+    except Exception as e:
+        flight_results = {"status": "error", "message": f"Unexpected error: {e}"}
+    except BaseException:
+        hotels_task.cancel()
+        raise
     
     # Check if search was interrupted
     if flight_results.get("status") == "interrupted":
-        state["partial_results"]["flights"] = flight_results.get("partial_results", {})
+        hotels_task.cancel()
         return {
-            **state,
+            **activation,
+            "partial_results": {**state.get("partial_results", {}), "flights": flight_results.get("partial_results", {})},
             "status": "interrupted",
             "is_interrupted": True
         }
     
     # Handle tool errors explicitly so the user sees what's wrong
     if flight_results.get("status") == "error":
+        hotels_task.cancel()
         err_msg = flight_results.get("message") or "Flight search error"
         code = flight_results.get("code")
         detail = f" (code {code})" if code else ""
         error_text = f"⚠️ Flight search failed{detail}: {err_msg}"
         return {
-            **state,
+            **activation,
             "current_agent": "flight_agent",
-            "messages": state["messages"] + [AIMessage(content=error_text)],
+            "messages": [AIMessage(content=error_text)],
             "status": "complete"
         }
     
@@ -440,29 +1029,36 @@ async def flight_agent(state: AgentState) -> dict[str, Any]:
     # Attempt to find itineraries/tickets
     results_payload = flight_results.get("results")
 
-    # Log the full results payload (safely truncated) for debugging/inspection
-    try:
-        logger = logging.getLogger(__name__)
-        payload_for_log = results_payload
-        if not isinstance(payload_for_log, (str, bytes)):
-            payload_for_log = json.dumps(payload_for_log, ensure_ascii=False, default=str)
-        if isinstance(payload_for_log, bytes):
-            payload_for_log = payload_for_log.decode(errors="ignore")
-        if isinstance(payload_for_log, str) and len(payload_for_log) > 4000:
-            payload_for_log = payload_for_log[:4000] + "... [truncated]"
-        logger.info(f"Flight API raw results: {payload_for_log}")
-    except Exception:
-        pass
+    # Log the full results payload (safely truncated) for debugging/inspection;
+    # skip building it entirely when INFO is disabled
+    if logger.isEnabledFor(logging.INFO):
+        try:
+            # Prefer the raw response body: slicing it keeps this O(4KB) instead
+            # of re-serializing the whole payload just to truncate it
+            raw_bytes = flight_results.get("raw_bytes")
+            if isinstance(raw_bytes, bytes):
+                payload_for_log = raw_bytes[:4000].decode(errors="ignore")
+                if len(raw_bytes) > 4000:
+                    payload_for_log += "... [truncated]"
+            elif isinstance(results_payload, str):
+                payload_for_log = results_payload[:4000]
+                if len(results_payload) > 4000:
+                    payload_for_log += "... [truncated]"
+            else:
+                # reprlib stops walking once its size budget is spent
+                payload_for_log = _LOG_REPR.repr(results_payload)
+            logger.info("Flight API raw results: %s", payload_for_log)
+        except Exception:
+            pass
     top_lines: list[str] = []
     top_structured: list[dict[str, Any]] = []
+    # Resolve the payload's "data" member once for every lookup below
+    data_obj = results_payload if isinstance(results_payload, dict) else {}
+    inner = data_obj.get("data")
+    root_obj = inner if isinstance(inner, dict) else data_obj
+    agg = root_obj.get("aggregation")
     try:
-        data_obj = results_payload if isinstance(results_payload, dict) else {}
-
         # 1) Aggregation summary if present
-        agg = None
-        root_obj = data_obj.get("data") if isinstance(data_obj.get("data"), dict) else data_obj
-        if isinstance(root_obj, dict):
-            agg = root_obj.get("aggregation")
         if isinstance(agg, dict):
             total = agg.get("totalCount") or agg.get("filteredTotalCount")
             stops_info = agg.get("stops") if isinstance(agg.get("stops"), list) else []
@@ -491,13 +1087,11 @@ async def flight_agent(state: AgentState) -> dict[str, Any]:
                 val = obj.get(key)
                 if isinstance(val, list) and val:
                     candidate_lists.append(val)
-        if isinstance(data_obj, dict):
-            add_lists_from(data_obj)
-            d = data_obj.get("data")
-            if isinstance(d, dict):
-                add_lists_from(d)
-            elif isinstance(d, list) and d:
-                candidate_lists.append(d)
+        add_lists_from(data_obj)
+        if isinstance(inner, dict):
+            add_lists_from(inner)
+        elif isinstance(inner, list) and inner:
+            candidate_lists.append(inner)
         # Fallback: scan any dict value that is a non-empty list
         if not candidate_lists:
             for v in data_obj.values():
@@ -508,80 +1102,9 @@ async def flight_agent(state: AgentState) -> dict[str, Any]:
         options = candidate_lists[0] if candidate_lists else []
         # Build up to 10 structured options; also create up to 3 summary lines
         for opt in options[:10]:
-            # Try various fields
-            price = None
-            currency = None
-            airline = None
-            depart_time = None
-            arrive_time = None
-            duration = None
-            stops = None
-
-            if isinstance(opt, dict):
-                # price fields
-                price = (
-                    (opt.get("price") if isinstance(opt.get("price"), (int, float, str)) else None)
-                    or (opt.get("price", {}).get("amount") if isinstance(opt.get("price"), dict) else None)
-                    or (opt.get("pricing", {}).get("total") if isinstance(opt.get("pricing"), dict) else None)
-                )
-                currency = (
-                    (opt.get("currency"))
-                    or (opt.get("price", {}).get("currency") if isinstance(opt.get("price"), dict) else None)
-                    or (opt.get("pricing", {}).get("currency") if isinstance(opt.get("pricing"), dict) else None)
-                )
-                # carrier/segments
-                segments = (
-                    opt.get("segments") or opt.get("legs") or opt.get("itinerarySegments")
-                )
-                if isinstance(segments, list) and segments:
-                    first_seg = segments[0]
-                    last_seg = segments[-1]
-                    if isinstance(first_seg, dict):
-                        airline = first_seg.get("carrier") or first_seg.get("airline") or first_seg.get("marketingCarrier") or airline
-                        depart_time = first_seg.get("departureTime") or first_seg.get("departure") or first_seg.get("departureDateTime")
-                    if isinstance(last_seg, dict):
-                        arrive_time = last_seg.get("arrivalTime") or last_seg.get("arrival") or last_seg.get("arrivalDateTime")
-                    stops = max(0, len(segments) - 1)
-                # duration
-                duration = opt.get("duration") or opt.get("totalDuration")
-
-            # Accumulate a structured item for UI parsing
-            top_structured.append({
-                "airline": airline or "",
-                "price": price if isinstance(price, (int, float, str)) else (
-                    {"amount": price.get("amount") or price.get("units"), "currency": currency or price.get("currency") or price.get("currencyCode")}
-                    if isinstance(price, dict) else None
-                ),
-                "currency": currency or "",
-                "from": from_id,
-                "to": to_id,
-                "departTime": depart_time or "",
-                "arriveTime": arrive_time or "",
-                "duration": duration or "",
-                "stops": stops if isinstance(stops, int) else None,
-                "segments": opt.get("segments") if isinstance(opt, dict) else None,
-            })
-
-            # Also build a concise bullet line for readability (first 3 only)
-            if len(top_lines) >= 3:
-                continue
-            line = "• "
-            if airline:
-                line += f"{airline} "
-            if price:
-                if currency:
-                    line += f"{price} {currency}"
-                else:
-                    line += f"{price}"
-            if depart_time or arrive_time:
-                line += f" | {depart_time or ''} → {arrive_time or ''}"
-            if duration:
-                line += f" | {duration}"
-            if stops is not None:
-                line += f" | Stops: {stops}"
-
-            # Only add if we got something meaningful
-            if len(line) > 2:
+            card, line = _flight_option(opt, from_id, to_id)
+            top_structured.append(card)
+            if line and len(top_lines) < 3:
                 top_lines.append(line)
     except Exception:
         top_lines = []
@@ -589,162 +1112,67 @@ async def flight_agent(state: AgentState) -> dict[str, Any]:
     # If we still have no structured options, try synthesizing from airlines aggregation
     if not top_structured:
         try:
-            root_obj = data_obj.get("data") if isinstance(data_obj.get("data"), dict) else data_obj
-            agg_obj = root_obj.get("aggregation") if isinstance(root_obj, dict) else None
-            airlines_list = agg_obj.get("airlines") if isinstance(agg_obj, dict) else None
+            airlines_list = agg.get("airlines") if isinstance(agg, dict) else None
             if isinstance(airlines_list, list) and airlines_list:
-                for al in airlines_list[:10]:
-                    if not isinstance(al, dict):
-                        continue
-                    name = al.get("name") or al.get("iataCode") or ""
-                    mp = al.get("minPricePerAdult") or al.get("minPrice") or {}
-                    price_obj = None
-                    currency = None
-                    if isinstance(mp, dict):
-                        amount = mp.get("units") or mp.get("amount")
-                        currency = mp.get("currencyCode") or mp.get("currency")
-                        price_obj = {"amount": amount, "currency": currency}
-                    top_structured.append({
-                        "airline": name,
-                        "airlineCode": al.get("iataCode"),
-                        "logoUrl": al.get("logoUrl"),
-                        "count": al.get("count"),
-                        "price": price_obj,
-                        "currency": currency or "",
-                        "from": from_id,
-                        "to": to_id,
-                        "departTime": "",
-                        "arriveTime": "",
-                        "duration": "",
-                        "stops": None,
-                        "segments": None,
-                    })
+                top_structured = [
+                    _airline_option(al, from_id, to_id) for al in airlines_list[:10] if isinstance(al, dict)
+                ]
         except Exception:
             pass
 
+    summary_parts = [base_line]
     if top_lines:
-        flight_summary = base_line + "\n\n" + "\n".join(top_lines)
+        summary_parts.append("\n".join(top_lines))
     else:
         # Fallback: include a compact snippet from payload to show meaningful output
         try:
             payload_obj = None
             if isinstance(results_payload, dict):
                 payload_obj = results_payload.get("data", results_payload)
-            snippet = json.dumps(payload_obj, ensure_ascii=False) if payload_obj is not None else str(results_payload)
+            snippet = _dumps(payload_obj) if payload_obj is not None else str(results_payload)
             if len(snippet) > 800:
                 snippet = snippet[:800] + "..."
-            flight_summary = base_line + ("\n\n" + snippet if snippet else "")
+            if snippet:
+                summary_parts.append(snippet)
         except Exception:
-            flight_summary = base_line
+            pass
 
-    # Chain: find hotels at destination city and append compact hotels JSON
-    hotels_compact: list[dict[str, Any]] = []
     try:
-        # Import here to avoid circulars
-        from tools import booking_search_destination, booking_search_hotels
-
-        # Derive a destination query from to_id (strip suffix)
-        dest_query = to_id.split(".")[0] if to_id else ""
-        # Look up destination
-        dest_res = await booking_search_destination.ainvoke({"query": dest_query})
-        if dest_res.get("status") == "success":
-            dest_payload = dest_res.get("results", {})
-            data_field = dest_payload.get("data") if isinstance(dest_payload, dict) else None
-            candidates = data_field if isinstance(data_field, list) else None
-            if candidates and len(candidates) > 0:
-                first = candidates[0]
-                dest_id = first.get("dest_id") or first.get("id") or first.get("destination_id")
-                search_type = first.get("search_type") or first.get("type") or "CITY"
-                if dest_id:
-                    # Compute hotel check-in/out from flight date as 2 nights
-                    try:
-                        ad = datetime.strptime(depart_date, "%Y-%m-%d")
-                        arrival_date = ad.strftime("%Y-%m-%d")
-                        departure_hotel = (ad + timedelta(days=2)).strftime("%Y-%m-%d")
-                    except Exception:
-                        arrival_date = depart_date
-                        departure_hotel = depart_date
-
-                    hotels_res = await booking_search_hotels.ainvoke({
-                        "dest_id": int(dest_id) if str(dest_id).lstrip("-").isdigit() else dest_id,
-                        "search_type": search_type,
-                        "arrival_date": arrival_date,
-                        "departure_date": departure_hotel,
-                        "adults": 1,
-                        "room_qty": 1,
-                        "page_number": 1,
-                        "units": "metric",
-                        "temperature_unit": "c",
-                        "languagecode": "en-us",
-                        "currency_code": "USD",
-                        "location": "US",
-                    })
-                    if hotels_res.get("status") == "success":
-                        h_payload = hotels_res.get("results", {})
-                        root = h_payload.get("data") if isinstance(h_payload, dict) else None
-                        hotels_list = None
-                        if isinstance(root, list):
-                            hotels_list = root
-                        elif isinstance(root, dict):
-                            hotels_list = root.get("hotels") or root.get("result") or root.get("items") or root.get("list")
-                        # Build compact hotels
-                        if isinstance(hotels_list, list):
-                            for h in hotels_list[:6]:
-                                prop = h.get("property", {}) if isinstance(h, dict) else {}
-                                name = prop.get("name") or h.get("name") or "Hotel"
-                                rating = prop.get("reviewScore") or prop.get("review_score")
-                                price_info = prop.get("priceBreakdown", {})
-                                gross = price_info.get("grossPrice", {})
-                                value = gross.get("value")
-                                currency = gross.get("currency") or price_info.get("currency")
-                                address = h.get("accessibilityLabel") or prop.get("address") or ""
-                                image_url = None
-                                photos = prop.get("photos") if isinstance(prop.get("photos"), list) else []
-                                if photos:
-                                    image_url = photos[0].get("url")
-                                hotels_compact.append({
-                                    "name": name,
-                                    "rating": rating,
-                                    "price": {"amount": value, "currency": currency} if value else None,
-                                    "location": address,
-                                    "imageUrl": image_url,
-                                    "amenities": []
-                                })
+        hotels_compact = await hotels_task
     except Exception:
-        pass
+        logger.debug("Hotel cards for flight reply skipped", exc_info=True)
+        hotels_compact = []
 
     # Append a compact JSON block of top options for the chat UI to parse into cards
-    try:
-        compact = {
-            "items": top_structured[:10],
-            "hotels": hotels_compact[:6] if hotels_compact else []
-        }
-        flight_summary = flight_summary + "\n\n" + json.dumps(compact, ensure_ascii=False)
-    except Exception:
-        pass
+    summary_parts.append(_render_cards(top_structured, hotels=hotels_compact))
+    flight_summary = "\n\n".join(summary_parts)
     
     # Update flight context
-    state["flight_context"] = {
+    now = time.time()
+    flight_context = {
         "last_search": {
             "origin": from_id,
             "destination": to_id,
-            "timestamp": time.time()
+            "timestamp": now
         },
-        "results": flight_results
+        # raw_bytes is only needed for logging; keep it out of the checkpoint
+        "results": {k: v for k, v in flight_results.items() if k != "raw_bytes"}
     }
     
     # Record completed tool call
-    state["completed_tool_calls"].append({
+    completed_call = {
         "tool": "search_flights",
         "agent": "flight_agent",
-        "timestamp": time.time(),
+        "timestamp": now,
         "results_count": None
-    })
+    }
     
     return {
-        **state,
+        **activation,
+        "flight_context": flight_context,
+        "completed_tool_calls": [completed_call],
         "current_agent": "flight_agent",
-        "messages": state["messages"] + [AIMessage(content=flight_summary)],
+        "messages": [AIMessage(content=flight_summary)],
         "status": "complete"
     }
 
@@ -763,43 +1191,14 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
     Outputs: Hotel search results, formatted for display
     """
     
-    # Check for interruption
-    if state.get("should_interrupt", False):
-        state["partial_results"]["hotels"] = "Search interrupted before completion"
-        return {
-            **state,
-            "status": "interrupted",
-            "is_interrupted": True,
-            "messages": state["messages"] + [
-                AIMessage(content="🏨 Hotel search was interrupted. Partial results saved.")
-            ]
-        }
-    
-    # Record agent activation
-    state["previous_agents"].append("hotel_agent")
-    state["active_tool_calls"].append("booking_search_hotels")
-
-    # Import tools lazily to avoid circulars
-    from tools import booking_search_destination, booking_search_hotels
+    # Record agent activation (appended to the audit trail by the state reducers)
+    activation = {
+        "previous_agents": ["hotel_agent"],
+        "active_tool_calls": ["booking_search_hotels"],
+    }
 
     # Extract rough location text from query
-    query_text = state.get("user_query", "")
-    q_lower = query_text.lower()
-    location = None
-    # Very simple "in X" heuristic first
-    if " in " in q_lower:
-        parts = q_lower.split(" in ", 1)
-        if len(parts) > 1:
-            location = parts[1].strip().split("\n")[0].strip()
-    if not location:
-        # Fallback: if coordinator details has destination, use that
-        details = state.get("coordinator_context", {}).get("extracted_details", {}) or {}
-        loc = details.get("destination") or details.get("origin")
-        if isinstance(loc, str) and loc.strip():
-            location = loc
-    if not location:
-        # Last resort: use whole query
-        location = query_text.strip() or "Mumbai"
+    location = _extract_location(state, default="Mumbai")
 
     # Interruption context
     interruption_context = {
@@ -813,9 +1212,9 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
         err = dest_res.get("message", "Destination lookup failed")
         error_text = f"⚠️ Hotel destination search failed: {err}"
         return {
-            **state,
+            **activation,
             "current_agent": "hotel_agent",
-            "messages": state["messages"] + [AIMessage(content=error_text)],
+            "messages": [AIMessage(content=error_text)],
             "status": "complete",
         }
 
@@ -825,9 +1224,9 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
     if not candidates:
         msg = f"⚠️ No hotel destinations found for '{location}'. Try another city."
         return {
-            **state,
+            **activation,
             "current_agent": "hotel_agent",
-            "messages": state["messages"] + [AIMessage(content=msg)],
+            "messages": [AIMessage(content=msg)],
             "status": "complete",
         }
 
@@ -835,38 +1234,66 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
     dest_id = first.get("dest_id") or first.get("id") or first.get("destination_id")
     search_type = first.get("search_type") or first.get("type") or "CITY"
 
-    # Basic dates: 2 nights starting ~3 weeks from now
+    # Dates the user asked for; otherwise 2 nights starting ~3 weeks from now
+    stay = _stay_dates(state)
+    arrival_date, departure_date = stay or (_utc_date(21), _utc_date(23))
+
+    # 2) Call Booking hotels search. For default dates the relaxed-date retry is
+    # started speculatively alongside it so an empty first result doesn't cost a
+    # second round trip; it is cancelled as soon as the primary search has hotels.
+    # Explicit dates are never swapped for other ones, so no retry is needed.
+    dest_arg = int(dest_id) if str(dest_id).lstrip("-").isdigit() else dest_id
+    alt_arrival = _utc_date(7)
+    alt_departure = _utc_date(9)
+    if stay:
+        # Already-resolved placeholder keeps the cancel/await paths below uniform
+        alt_task = asyncio.get_running_loop().create_future()
+        alt_task.set_result({"status": "skipped"})
+    else:
+        alt_task = asyncio.create_task(booking_search_hotels.ainvoke({
+            "dest_id": dest_arg,
+            "search_type": search_type,
+            "arrival_date": alt_arrival,
+            "departure_date": alt_departure,
+            "adults": 1,
+            "room_qty": 1,
+            "page_number": 1,
+            "price_min": 0,
+            "price_max": 0,
+            "units": "metric",
+            "temperature_unit": "c",
+            "languagecode": "en-us",
+            "currency_code": "USD",
+        }))
+        # Don't leave an unretrieved exception behind if the retry ends up unused
+        alt_task.add_done_callback(lambda t: t.cancelled() or t.exception())
     try:
-        base = datetime.utcnow() + timedelta(days=21)
-        arrival_date = base.strftime("%Y-%m-%d")
-        departure_date = (base + timedelta(days=2)).strftime("%Y-%m-%d")
-    except Exception:
-        arrival_date = datetime.utcnow().strftime("%Y-%m-%d")
-        departure_date = arrival_date
-
-    # 2) Call Booking hotels search
-    hotels_res = await booking_search_hotels.ainvoke({
-        "dest_id": int(dest_id) if str(dest_id).lstrip("-").isdigit() else dest_id,
-        "search_type": search_type,
-        "arrival_date": arrival_date,
-        "departure_date": departure_date,
-        "adults": 1,
-        "room_qty": 1,
-        "page_number": 1,
-        "price_min": 0,
-        "price_max": 0,
-        "sort_by": "REVIEW_SCORE",
-        "units": "metric",
-        "temperature_unit": "c",
-        "languagecode": "en-us",
-        "currency_code": "USD",
-        "interruption_check": interruption_context,
-    })
+        hotels_res = await booking_search_hotels.ainvoke({
+            "dest_id": dest_arg,
+            "search_type": search_type,
+            "arrival_date": arrival_date,
+            "departure_date": departure_date,
+            "adults": 1,
+            "room_qty": 1,
+            "page_number": 1,
+            "price_min": 0,
+            "price_max": 0,
+            "sort_by": "REVIEW_SCORE",
+            "units": "metric",
+            "temperature_unit": "c",
+            "languagecode": "en-us",
+            "currency_code": "USD",
+            "interruption_check": interruption_context,
+        })
+    except BaseException:
+        alt_task.cancel()
+        raise
 
     if hotels_res.get("status") == "interrupted":
-        state["partial_results"]["hotels"] = hotels_res.get("partial_results", {})
+        alt_task.cancel()
         return {
-            **state,
+            **activation,
+            "partial_results": {**state.get("partial_results", {}), "hotels": hotels_res.get("partial_results", {})},
             "status": "interrupted",
             "is_interrupted": True,
         }
@@ -876,65 +1303,30 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
         code = hotels_res.get("code")
         detail = f" (code {code})" if code else ""
         error_text = f"⚠️ Hotel search failed{detail}: {err_msg}"
+        alt_task.cancel()
         return {
-            **state,
+            **activation,
             "current_agent": "hotel_agent",
-            "messages": state["messages"] + [AIMessage(content=error_text)],
+            "messages": [AIMessage(content=error_text)],
             "status": "complete",
         }
 
     # Extract hotel list from Booking.com payload
     def _extract_hotel_list(payload: Any) -> Any:
-        root_local = payload.get("data") if isinstance(payload, dict) else None
-        hotels_local = None
+        if not isinstance(payload, dict):
+            return None
+        root_local = payload.get("data")
         if isinstance(root_local, list):
-            hotels_local = root_local
-        elif isinstance(root_local, dict):
-            hotels_local = (
-                root_local.get("hotels")
-                or root_local.get("result")
-                or root_local.get("items")
-                or root_local.get("list")
-            )
-
-            if hotels_local is None:
-                for vv in root_local.values():
-                    if isinstance(vv, list) and vv and isinstance(vv[0], dict):
-                        hotels_local = vv
-                        break
-
-        if hotels_local is None and isinstance(payload, dict):
-            for vv in payload.values():
-                if isinstance(vv, list) and vv and isinstance(vv[0], dict):
-                    hotels_local = vv
-                    break
-        return hotels_local
+            return root_local
+        return _record_list(root_local, _HOTEL_KEYS) or _record_list(payload, ())
 
     results_payload = hotels_res.get("results")
     hotels_list = _extract_hotel_list(results_payload)
 
-    # If first search came back with no hotels, retry once with relaxed params
+    # If first search came back with no hotels, use the relaxed-date retry
     if isinstance(hotels_list, list) and not hotels_list:
         try:
-            alt_base = datetime.utcnow() + timedelta(days=7)
-            alt_arrival = alt_base.strftime("%Y-%m-%d")
-            alt_departure = (alt_base + timedelta(days=2)).strftime("%Y-%m-%d")
-
-            hotels_res_alt = await booking_search_hotels.ainvoke({
-                "dest_id": int(dest_id) if str(dest_id).lstrip("-").isdigit() else dest_id,
-                "search_type": search_type,
-                "arrival_date": alt_arrival,
-                "departure_date": alt_departure,
-                "adults": 1,
-                "room_qty": 1,
-                "page_number": 1,
-                "price_min": 0,
-                "price_max": 0,
-                "units": "metric",
-                "temperature_unit": "c",
-                "languagecode": "en-us",
-                "currency_code": "USD",
-            })
+            hotels_res_alt = await alt_task
             if hotels_res_alt.get("status") == "success":
                 results_payload = hotels_res_alt.get("results")
                 hotels_list = _extract_hotel_list(results_payload)
@@ -943,57 +1335,28 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
                 departure_date = alt_departure
         except Exception:
             pass
+    else:
+        alt_task.cancel()
 
-    hotels_compact: list[dict[str, Any]] = []
-    if isinstance(hotels_list, list):
-        for h in hotels_list[:10]:
-            if not isinstance(h, dict):
-                continue
-            prop = h.get("property", {}) if isinstance(h.get("property"), dict) else h
-            name = prop.get("name") or h.get("name") or "Hotel"
-            rating = prop.get("reviewScore") or prop.get("review_score")
-            price_info = prop.get("priceBreakdown", {}) if isinstance(prop.get("priceBreakdown"), dict) else {}
-            gross = price_info.get("grossPrice", {}) if isinstance(price_info.get("grossPrice"), dict) else {}
-            value = gross.get("value")
-            currency = gross.get("currency") or price_info.get("currency")
-            address = (
-                h.get("accessibilityLabel")
-                or prop.get("address")
-                or prop.get("city")
-                or ""
-            )
-            image_url = None
-            photos = prop.get("photos") if isinstance(prop.get("photos"), list) else []
-            if photos:
-                image_url = photos[0].get("url")
-
-            hotels_compact.append(
-                {
-                    "name": name,
-                    "rating": rating,
-                    "price": {"amount": value, "currency": currency} if value else None,
-                    "location": address,
-                    "imageUrl": image_url,
-                    "amenities": [],
-                }
-            )
+    hotels_compact: list[dict[str, Any]] = (
+        [_normalize_hotel(h) for h in hotels_list[:10] if isinstance(h, dict)]
+        if isinstance(hotels_list, list)
+        else []
+    )
 
     count = len(hotels_compact)
     base_line = f"🏨 Searching hotels in {location.title() if isinstance(location, str) else location} for {arrival_date} to {departure_date}."
-    if count:
-        hotel_summary = base_line + f"\n\nFound {count} options."
-    else:
-        hotel_summary = base_line + "\n\nNo hotels found from Booking.com payload."
+    summary_parts = [
+        base_line,
+        f"Found {count} options." if count else "No hotels found from Booking.com payload.",
+    ]
 
     # Append compact JSON for UI cards (similar shape to flight_agent)
-    try:
-        compact = {"items": [], "hotels": hotels_compact[:10]}
-        hotel_summary = hotel_summary + "\n\n" + json.dumps(compact, ensure_ascii=False)
-    except Exception:
-        pass
+    summary_parts.append(_render_cards([], hotels=hotels_compact))
+    hotel_summary = "\n\n".join(summary_parts)
 
     # Update hotel context
-    state["hotel_context"] = {
+    hotel_context = {
         "last_search": {
             "location": location,
             "results_count": count,
@@ -1003,9 +1366,10 @@ async def hotel_agent(state: AgentState) -> dict[str, Any]:
     }
 
     return {
-        **state,
+        **activation,
+        "hotel_context": hotel_context,
         "current_agent": "hotel_agent",
-        "messages": state["messages"] + [AIMessage(content=hotel_summary)],
+        "messages": [AIMessage(content=hotel_summary)],
         "status": "complete"
     }
 
@@ -1023,38 +1387,15 @@ async def research_agent(state: AgentState) -> dict[str, Any]:
     Outputs: Informative response
     """
     
-    if state.get("should_interrupt", False):
-        return {
-            **state,
-            "status": "interrupted",
-            "is_interrupted": True,
-            "messages": state["messages"] + [
-                AIMessage(content="🔍 Research was interrupted.")
-            ]
-        }
-    
-    state["previous_agents"].append("research_agent")
+    activation = {"previous_agents": ["research_agent"]}
 
     query_text = state.get("user_query", "")
     q_lower = query_text.lower()
 
     # If this is clearly an attractions query, answer using Booking.com attractions APIs
     if any(kw in q_lower for kw in ["attraction", "things to do", "places to visit", "sightseeing"]):
-        from tools import search_attractions, get_attraction_details
-
         # Derive location from query or coordinator context
-        location: str | None = None
-        if " in " in q_lower:
-            parts = q_lower.split(" in ", 1)
-            if len(parts) > 1:
-                location = parts[1].strip().split("\n")[0].strip()
-        if not location:
-            details = state.get("coordinator_context", {}).get("extracted_details", {}) or {}
-            loc = details.get("destination") or details.get("origin")
-            if isinstance(loc, str) and loc.strip():
-                location = loc
-        if not location:
-            location = query_text.strip() or "Delhi"
+        location = _extract_location(state, default="Delhi")
 
         interruption_ctx = {
             "should_interrupt": state.get("should_interrupt", False),
@@ -1068,7 +1409,7 @@ async def research_agent(state: AgentState) -> dict[str, Any]:
 
         if attr_res.get("status") == "interrupted":
             return {
-                **state,
+                **activation,
                 "status": "interrupted",
                 "is_interrupted": True,
             }
@@ -1077,132 +1418,109 @@ async def research_agent(state: AgentState) -> dict[str, Any]:
             msg = attr_res.get("message") or "Attraction search error"
             fallback = f"⚠️ Could not fetch live attractions for {location}. {msg}"
             return {
-                **state,
+                **activation,
                 "current_agent": "research_agent",
-                "messages": state["messages"] + [AIMessage(content=fallback)],
+                "messages": [AIMessage(content=fallback)],
                 "status": "complete",
             }
 
         # Extract attraction list from search results
         results_payload = attr_res.get("results")
         root = results_payload.get("data") if isinstance(results_payload, dict) else None
-        attractions_list = None
-        if isinstance(root, list):
-            attractions_list = root
-        elif isinstance(root, dict):
-            attractions_list = (
-                root.get("attractions")
-                or root.get("items")
-                or root.get("results")
-            )
-            if attractions_list is None:
-                for v in root.values():
-                    if isinstance(v, list) and v and isinstance(v[0], dict):
-                        attractions_list = v
-                        break
+        attractions_list = _record_list(root, _ATTR_KEYS)
 
         if not isinstance(attractions_list, list) or not attractions_list:
             text = f"🎡 I couldn't find specific attractions for {location} from Booking.com."
             return {
-                **state,
+                **activation,
                 "current_agent": "research_agent",
-                "messages": state["messages"] + [AIMessage(content=text)],
+                "messages": [AIMessage(content=text)],
                 "status": "complete",
             }
 
-        # For top few attractions, also fetch detailed info
+        # For top few attractions, also fetch detailed info (all lookups in parallel)
         bullets: list[str] = []
         max_items = 5
-        for a in attractions_list[:max_items]:
-            if not isinstance(a, dict):
-                continue
-            # Basic fields from searchAttractions
+        top_items = [a for a in attractions_list[:max_items] if isinstance(a, dict)]
+
+        def _attraction_id(a: dict[str, Any]) -> Any:
+            info = a.get("property") if isinstance(a.get("property"), dict) else a
+            return a.get("id") or info.get("id") or a.get("pinnedProductId")
+
+        detail_results = await asyncio.gather(
+            *(
+                get_attraction_details.ainvoke({
+                    "attraction_id": attr_id,
+                    "interruption_check": interruption_ctx,
+                })
+                if (attr_id := _attraction_id(a))
+                else asyncio.sleep(0, result=None)
+                for a in top_items
+            ),
+            return_exceptions=True,
+        )
+
+        for a, details_res in zip(top_items, detail_results):
             info = a.get("property") if isinstance(a.get("property"), dict) else a
-            name = info.get("name") or a.get("title") or "Attraction"
-            rating = info.get("reviewScore") or info.get("rating")
-            reviews = info.get("reviewCount") or info.get("reviews")
-            price_info = info.get("priceBreakdown", {}) if isinstance(info.get("priceBreakdown"), dict) else {}
-            gross = price_info.get("grossPrice", {}) if isinstance(price_info.get("grossPrice"), dict) else {}
-            value = gross.get("value")
-            currency = gross.get("currency") or price_info.get("currency")
-
-            # Try to get an ID for details
-            attr_id = a.get("id") or info.get("id") or a.get("pinnedProductId")
             desc = ""
             duration = info.get("duration")
 
-            if attr_id:
-                try:
-                    details_res = await get_attraction_details.ainvoke({
-                        "attraction_id": attr_id,
-                        "interruption_check": interruption_ctx,
-                    })
-                    if details_res.get("status") == "success":
-                        det_payload = details_res.get("results")
-                        det_root = det_payload.get("data") if isinstance(det_payload, dict) else det_payload
-                        if isinstance(det_root, dict):
-                            desc = det_root.get("description") or det_root.get("shortDescription") or desc
-                            duration = det_root.get("duration") or duration
-                except Exception:
-                    pass
+            if isinstance(details_res, dict) and details_res.get("status") == "success":
+                det_payload = details_res.get("results")
+                det_root = det_payload.get("data") if isinstance(det_payload, dict) else det_payload
+                if isinstance(det_root, dict):
+                    desc = det_root.get("description") or det_root.get("shortDescription") or desc
+                    duration = det_root.get("duration") or duration
 
-            line = f"• {name}"
-            if rating:
-                try:
-                    line += f" | Rating: {float(rating):.1f}★"
-                except Exception:
-                    line += f" | Rating: {rating}★"
-            if reviews:
-                line += f" ({reviews} reviews)"
-            if value is not None:
-                cur = currency or "INR"
-                try:
-                    line += f" | From approx. {float(value):.0f} {cur}"
-                except Exception:
-                    line += f" | From approx. {value} {cur}"
-            if duration:
-                line += f" | Duration: {duration}"
-            if desc:
-                line += f"\n  {desc.strip()}"
-
-            bullets.append(line)
+            bullets.append(_attraction_bullet(_normalize_attraction(a, location), duration, desc))
 
         header = f"🎡 Here are some of the best attractions in {location} from Booking.com:\n\n"
         body = "\n\n".join(bullets) if bullets else "No detailed attractions could be listed."
         text = header + body
 
         return {
-            **state,
+            **activation,
             "current_agent": "research_agent",
-            "messages": state["messages"] + [AIMessage(content=text)],
+            "messages": [AIMessage(content=text)],
             "status": "complete",
         }
 
-    # Non-attraction queries: keep existing web_search behavior
-    from tools import web_search
-
-    search_results = await web_search.ainvoke({
-        "query": state["user_query"],
-        "max_results": 3
-    })
+    # Non-attraction queries: web_search each sub-question concurrently
+    sub_queries = _split_sub_queries(state["user_query"])
+    per_query = 3 if len(sub_queries) == 1 else 2
+    search_batches = await asyncio.gather(*(
+        web_search.ainvoke({"query": q, "max_results": per_query}) for q in sub_queries
+    ))
 
-    if search_results.get("status") == "interrupted":
+    if any(batch.get("status") == "interrupted" for batch in search_batches):
         return {
-            **state,
+            **activation,
             "status": "interrupted",
             "is_interrupted": True
         }
 
-    results = search_results.get("results", [])
-    response = f"🔍 Here's what I found about your travel query:\n\n"
-
-    for result in results:
-        response += f"• {result['title']}\n  {result['snippet']}\n\n"
+    # Merge in sub-question order, dropping pages already listed
+    seen_urls: set[str] = set()
+    results = []
+    for batch in search_batches:
+        for result in batch.get("results", []):
+            url = result.get("url")
+            if url and url in seen_urls:
+                continue
+            seen_urls.add(url)
+            results.append(result)
+    # Collapse whitespace in titles/snippets so each result stays one bullet
+    # and identical searches render byte-identical replies
+    response = _RESEARCH_HEADER + "".join(
+        f"• {_WHITESPACE_RE.sub(' ', str(result['title'])).strip()}\n"
+        f"  {_WHITESPACE_RE.sub(' ', str(result['snippet'])).strip()}\n\n"
+        for result in results
+    )
 
     return {
-        **state,
+        **activation,
         "current_agent": "research_agent",
-        "messages": state["messages"] + [AIMessage(content=response)],
+        "messages": [AIMessage(content=response)],
         "status": "complete"
     }
 
@@ -1213,35 +1531,10 @@ async def attractions_agent(state: AgentState) -> dict[str, Any]:
     and returns a compact JSON block suitable for card rendering.
     """
 
-    if state.get("should_interrupt", False):
-        return {
-            **state,
-            "status": "interrupted",
-            "is_interrupted": True,
-            "messages": state["messages"] + [
-                AIMessage(content="🎡 Attraction search was interrupted.")
-            ],
-        }
-
-    state["previous_agents"].append("attractions_agent")
-
-    from tools import search_attractions
+    activation = {"previous_agents": ["attractions_agent"]}
 
     # Extract rough location text from query
-    query_text = state.get("user_query", "")
-    q_lower = query_text.lower()
-    location = None
-    if " in " in q_lower:
-        parts = q_lower.split(" in ", 1)
-        if len(parts) > 1:
-            location = parts[1].strip().split("\n")[0].strip()
-    if not location:
-        details = state.get("coordinator_context", {}).get("extracted_details", {}) or {}
-        loc = details.get("destination") or details.get("origin")
-        if isinstance(loc, str) and loc.strip():
-            location = loc
-    if not location:
-        location = query_text.strip() or "Mumbai"
+    location = _extract_location(state, default="Mumbai")
 
     interruption_context = {
         "should_interrupt": state.get("should_interrupt", False),
@@ -1255,7 +1548,7 @@ async def attractions_agent(state: AgentState) -> dict[str, Any]:
 
     if tool_res.get("status") == "interrupted":
         return {
-            **state,
+            **activation,
             "status": "interrupted",
             "is_interrupted": True,
         }
@@ -1263,74 +1556,36 @@ async def attractions_agent(state: AgentState) -> dict[str, Any]:
     if tool_res.get("status") == "error":
         msg = tool_res.get("message") or "Attraction search error"
         return {
-            **state,
+            **activation,
             "current_agent": "attractions_agent",
-            "messages": state["messages"] + [AIMessage(content=f"⚠️ Attraction search failed: {msg}")],
+            "messages": [AIMessage(content=f"⚠️ Attraction search failed: {msg}")],
             "status": "complete",
         }
 
     results_payload = tool_res.get("results")
     root = results_payload.get("data") if isinstance(results_payload, dict) else None
-    attractions_list = None
-    if isinstance(root, list):
-        attractions_list = root
-    elif isinstance(root, dict):
-        attractions_list = (
-            root.get("attractions")
-            or root.get("items")
-            or root.get("results")
-        )
-        if attractions_list is None:
-            for v in root.values():
-                if isinstance(v, list) and v and isinstance(v[0], dict):
-                    attractions_list = v
-                    break
+    attractions_list = _record_list(root, _ATTR_KEYS)
 
-    compact: list[dict[str, Any]] = []
-    if isinstance(attractions_list, list):
-        for a in attractions_list[:10]:
-            if not isinstance(a, dict):
-                continue
-            info = a.get("property") if isinstance(a.get("property"), dict) else a
-            name = info.get("name") or a.get("title") or "Attraction"
-            rating = info.get("reviewScore") or info.get("rating")
-            reviews = info.get("reviewCount") or info.get("reviews")
-            price_info = info.get("priceBreakdown", {}) if isinstance(info.get("priceBreakdown"), dict) else {}
-            gross = price_info.get("grossPrice", {}) if isinstance(price_info.get("grossPrice"), dict) else {}
-            value = gross.get("value")
-            currency = gross.get("currency") or price_info.get("currency")
-            image_url = None
-            photos = info.get("photoUrls") if isinstance(info.get("photoUrls"), list) else []
-            if photos:
-                image_url = photos[0]
-
-            compact.append(
-                {
-                    "name": name,
-                    "rating": rating,
-                    "reviews": reviews,
-                    "price": {"amount": value, "currency": currency} if value else None,
-                    "location": location,
-                    "imageUrl": image_url,
-                }
-            )
+    compact: list[dict[str, Any]] = (
+        [_normalize_attraction(a, location) for a in attractions_list[:10] if isinstance(a, dict)]
+        if isinstance(attractions_list, list)
+        else []
+    )
 
     count = len(compact)
     base_line = f"🎡 Searching attractions in {location}."
-    if count:
-        summary = base_line + f"\n\nFound {count} options."
-    else:
-        summary = base_line + "\n\nNo attractions found from Booking.com payload; showing any available data."
+    summary_parts = [
+        base_line,
+        f"Found {count} options." if count
+        else "No attractions found from Booking.com payload; showing any available data.",
+    ]
 
-    try:
-        payload = {"items": [], "attractions": compact[:10]}
-        summary = summary + "\n\n" + json.dumps(payload, ensure_ascii=False)
-    except Exception:
-        pass
+    summary_parts.append(_render_cards([], attractions=compact))
+    summary = "\n\n".join(summary_parts)
 
     return {
-        **state,
+        **activation,
         "current_agent": "attractions_agent",
-        "messages": state["messages"] + [AIMessage(content=summary)],
+        "messages": [AIMessage(content=summary)],
         "status": "complete",
     }
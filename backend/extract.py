@@ -0,0 +1,133 @@
+"""
+Route extraction for the flight agent.
+Pure string/regex helpers with simple types, kept separate from the agent code
+so they can be compiled ahead of time (e.g. with mypyc) without touching LangChain.
+"""
+
+from typing import Mapping, Optional
+from types import MappingProxyType
+import re
+
+
+# Common city names mapped to Booking flight location IDs
+CITY_ALIASES: Mapping[str, str] = MappingProxyType({
+    "new york": "NYC.CITY",
+    "mumbai": "BOM.AIRPORT",
+    "bombay": "BOM.AIRPORT",
+    "delhi": "DEL.AIRPORT",
+    "new delhi": "DEL.AIRPORT",
+    "london": "LON.CITY",
+    "paris": "PAR.CITY",
+})
+
+# Precompiled patterns shared across invocations
+_IATA_FULL_RE = re.compile(r"[A-Z]{3}")
+# One tagged alternation for flight_agent's route extraction. The from/to
+# phrase is a lookahead so the IATA tokens inside it are still matched.
+_ROUTE_TOKEN_RE = re.compile(
+    r"(?P<explicit_id>\b[A-Z]{3}\.(?:AIRPORT|CITY)\b)"
+    r"|(?=(?i:from\s+(?P<pair_from>[a-z\s]+?)\s+to\s+(?P<pair_to>[a-z\s]+)))"
+    r"|(?P<date>\b\d{4}-\d{2}-\d{2}\b)"
+    r"|(?P<city>\b(?i:" + "|".join(map(re.escape, sorted(CITY_ALIASES, key=len, reverse=True))) + r")\b)"
+    r"|(?P<iata>\b[A-Z]{3}\b)"
+)
+
+
+def _apply_from_to(
+    pair: tuple[str, str] | None, from_id: str | None, to_id: str | None
+) -> tuple[str | None, str | None]:
+    """Fill missing ids from a 'from X to Y' match when X/Y are IATA codes."""
+    if pair:
+        cand_from = pair[0].strip().upper()
+        cand_to = pair[1].strip().upper()
+        if not from_id and _IATA_FULL_RE.fullmatch(cand_from):
+            from_id = cand_from + ".AIRPORT"
+        if not to_id and _IATA_FULL_RE.fullmatch(cand_to):
+            to_id = cand_to + ".AIRPORT"
+    return from_id, to_id
+
+
+def extract_route(
+    history_text: str, raw_query: str, state_from: Optional[str] = None, state_to: Optional[str] = None
+) -> tuple[str, str, Optional[str], list[str]]:
+    """
+    Resolve flight origin/destination ids and departure date from the conversation.
+    
+    ``raw_query`` must be the tail of ``history_text``; ids in the current query
+    take precedence over ones from earlier turns. Returns
+    ``(from_id, to_id, depart_date, assumed)`` where ``assumed`` lists any
+    defaults that were filled in.
+    """
+    # Tokenize the whole conversation in a single pass. raw_query is the tail
+    # of history_text, so tokens at or after query_start belong to it.
+    query_start = len(history_text) - len(raw_query)
+    current_ids: list[str] = []
+    history_ids: list[str] = []
+    iatas: list[str] = []
+    current_pair: tuple[str, str] | None = None
+    history_pair: tuple[str, str] | None = None
+    depart_date: Optional[str] = None
+    cities: set[str] = set()
+    # Filter out common words accidentally in caps
+    common = {"USA", "THE", "AND"}
+    for m in _ROUTE_TOKEN_RE.finditer(history_text):
+        explicit_id = m.group("explicit_id")
+        if explicit_id:
+            history_ids.append(explicit_id)
+            if m.start() >= query_start:
+                current_ids.append(explicit_id)
+            if explicit_id[:3] not in common:
+                iatas.append(explicit_id[:3])
+        elif m.group("pair_from") is not None:
+            pair = (m.group("pair_from"), m.group("pair_to"))
+            history_pair = history_pair or pair
+            if current_pair is None and m.start() >= query_start:
+                current_pair = pair
+        elif m.group("date"):
+            depart_date = depart_date or m.group("date")
+        elif m.group("city"):
+            cities.add(m.group("city").lower())
+        elif m.group("iata") not in common:
+            iatas.append(m.group("iata"))
+
+    # Extract explicit fromId/toId prioritizing the most recent user query
+    from_id = current_ids[0] if current_ids else None
+    to_id = current_ids[1] if len(current_ids) >= 2 else None
+    # Try simple 'X to Y' in current query for IATA codes
+    if not (from_id and to_id):
+        from_id, to_id = _apply_from_to(current_pair, from_id, to_id)
+
+    # Fall back to conversation history if still missing
+    if not (from_id and to_id):
+        if not from_id and len(history_ids) >= 1:
+            from_id = history_ids[0]
+        if not to_id and len(history_ids) >= 2:
+            to_id = history_ids[1]
+    if not (from_id and to_id):
+        from_id, to_id = _apply_from_to(history_pair, from_id, to_id)
+
+    # If still missing, use any standalone IATA codes (take first two order of appearance)
+    if not (from_id and to_id):
+        if not from_id and len(iatas) >= 1:
+            from_id = iatas[0] + ".AIRPORT"
+        if not to_id and len(iatas) >= 2:
+            to_id = iatas[1] + ".AIRPORT"
+
+    # Map common city names to CITY codes if present in text
+    for name, code in CITY_ALIASES.items():
+        if name in cities:
+            # If destination not set, prefer to assign to_id
+            if not to_id:
+                to_id = code
+            elif not from_id:
+                from_id = code
+
+    # Single fallback ladder for anything the extractor couldn't resolve
+    assumed: list[str] = []
+    if not from_id:
+        from_id = f"{state_from or 'BOM'}.AIRPORT"
+        assumed.append(f"origin={from_id}")
+    if not to_id:
+        to_id = f"{state_to or 'DEL'}.AIRPORT"
+        assumed.append(f"destination={to_id}")
+    return from_id, to_id, depart_date, assumed
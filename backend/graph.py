@@ -3,11 +3,42 @@ LangGraph multi-agent graph construction.
 Defines the workflow, routing logic, and state transitions.
 """
 
+import os
+from collections import OrderedDict
+
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from state import AgentState
 from agents import coordinator_agent, flight_agent, hotel_agent, research_agent
-from typing import Literal
+from typing import Final, Literal
+
+# Conversation threads kept in memory; the least recently active are dropped
+_CHECKPOINT_MAX_THREADS = max(1, int(os.getenv("CHECKPOINT_MAX_THREADS", "1000")))
+
+# Specialist nodes the coordinator may hand off to; anything else (e.g.
+# "attractions_agent", which research_agent covers) falls back to research
+_SPECIALISTS: Final[tuple[str, ...]] = ("flight_agent", "hotel_agent", "research_agent")
+_VALID_AGENTS: Final[frozenset[str]] = frozenset(_SPECIALISTS)
+# should_continue outcome -> next node, shared by every specialist
+_CONTINUE_MAP: Final[dict[str, str]] = {"coordinator": "coordinator", "end": END}
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver that forgets the least recently written threads beyond ``max_threads``."""
+
+    def __init__(self, max_threads: int) -> None:
+        super().__init__()
+        self.max_threads = max_threads
+        self._recent_threads: OrderedDict[str, None] = OrderedDict()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        self._recent_threads[thread_id] = None
+        self._recent_threads.move_to_end(thread_id)
+        while len(self._recent_threads) > self.max_threads:
+            self.delete_thread(self._recent_threads.popitem(last=False)[0])
+        return saved
 
 
 def route_after_coordinator(state: AgentState) -> Literal["flight_agent", "hotel_agent", "research_agent"]:
@@ -19,8 +50,7 @@ def route_after_coordinator(state: AgentState) -> Literal["flight_agent", "hotel
     next_agent = state.get("next_agent", "research_agent")
     
     # Validate routing
-    valid_agents = ["flight_agent", "hotel_agent", "research_agent"]
-    if next_agent not in valid_agents:
+    if next_agent not in _VALID_AGENTS:
         return "research_agent"
     
     return next_agent  # type: ignore
@@ -55,7 +85,7 @@ def build_graph() -> StateGraph:
     START → Coordinator → [Flight Agent | Hotel Agent | Research Agent] → END
     
     Features:
-    - State persistence via MemorySaver checkpointer
+    - State persistence via an in-memory checkpointer bounded by thread count
     - Conditional routing based on intent
     - Support for interruptions at any node
     - Conversation history maintained across agents
@@ -89,35 +119,11 @@ def build_graph() -> StateGraph:
     )
     
     # Specialist → END or back to Coordinator (for handoffs)
-    builder.add_conditional_edges(
-        "flight_agent",
-        should_continue,
-        {
-            "coordinator": "coordinator",
-            "end": END
-        }
-    )
-    
-    builder.add_conditional_edges(
-        "hotel_agent",
-        should_continue,
-        {
-            "coordinator": "coordinator",
-            "end": END
-        }
-    )
-    
-    builder.add_conditional_edges(
-        "research_agent",
-        should_continue,
-        {
-            "coordinator": "coordinator",
-            "end": END
-        }
-    )
+    for node in _SPECIALISTS:
+        builder.add_conditional_edges(node, should_continue, _CONTINUE_MAP)
     
     # Compile graph with checkpointer for state persistence
-    checkpointer = MemorySaver()
+    checkpointer = BoundedMemorySaver(_CHECKPOINT_MAX_THREADS)
     
     graph = builder.compile(
         checkpointer=checkpointer,
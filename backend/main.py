@@ -3,38 +3,141 @@ FastAPI server with Server-Sent Events (SSE) streaming for multi-agent system.
 Handles request interruption, cancellation, and state management.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import Optional, AsyncGenerator
+from typing import Any, AsyncGenerator, Callable, Mapping, Optional
 import asyncio
-import json
+import os
+import orjson
+import re
 import uuid
 import time
 import logging
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from types import MappingProxyType
 
 from graph import travel_graph
+from agents import warmup_coordinator
+from tools import booking_search_hotels, search_flights, shutdown_tools, warmup_http_client
 from state import AgentState
 from langchain_core.messages import HumanMessage
-from typing import Optional, AsyncGenerator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Track active queries for interruption
-active_queries: dict[str, dict] = {}
-interruption_flags: dict[str, bool] = {}
+
+@dataclass(slots=True)
+class QueryEntry:
+    """Bookkeeping for one streamed query, from request until its stream ends."""
+    thread_id: str
+    query: str
+    start_time: float = field(default_factory=time.time)
+    status: str = "active"
+    interrupted: bool = False
+    interrupt_time: float | None = None
+    interrupt_reason: str | None = None
+    holds_slot: bool = False  # owns a _STREAM_SLOTS permit
+    # Running graph; /api/chat/cancel cancels it so an in-flight tool call is
+    # abandoned at its next await instead of after the node returns
+    task: asyncio.Task | None = None
+
+    def info(self) -> dict:
+        """JSON-safe view for the status endpoint."""
+        info = {
+            "thread_id": self.thread_id,
+            "query": self.query,
+            "start_time": self.start_time,
+            "status": self.status,
+        }
+        if self.interrupt_time is not None:
+            info["interrupt_time"] = self.interrupt_time
+            info["interrupt_reason"] = self.interrupt_reason
+        return info
+
+
+# Track active queries for interruption (always read with .get, never [])
+active_queries: dict[str, QueryEntry] = {}
+
+# Cap on concurrent SSE streams per process; a request waits briefly for a
+# slot, then gets 429 instead of starting yet another graph run
+_STREAM_SLOTS = asyncio.Semaphore(max(1, int(os.getenv("MAX_CONCURRENT_STREAMS", "32"))))
+_STREAM_ADMIT_TIMEOUT = 2.0  # seconds
+
+
+def _finish_query(query_id: str) -> None:
+    """Forget a query and free its stream slot; safe to call more than once."""
+    entry = active_queries.pop(query_id, None)
+    if entry is not None and entry.holds_slot:
+        _STREAM_SLOTS.release()
+
+# Queue sentinel marking the end of a graph event stream
+_STREAM_END = object()
+
+
+# Chain events whose name marks an agent node (or its routing edge) are relayed
+_AGENT_NAME_RE = re.compile(r"coordinator|flight|hotel|research")
+# Graph events buffered per stream before the graph waits for the client
+_SSE_QUEUE_MAXSIZE = max(1, int(os.getenv("SSE_QUEUE_MAXSIZE", "64")))
+# SSE comment sent when the graph has been quiet this long (seconds); EventSource
+# and the frontend parser ignore it, but it keeps idle proxies from timing out
+_SSE_PING_INTERVAL = 15.0
+_SSE_PING = b": ping\n\n"
+# How often (seconds) an idle stream checks whether its client went away. Every
+# quiet second ends the queue wait with asyncio.TimeoutError (not the builtin
+# TimeoutError on 3.10), so that is what the stream loop must catch.
+_DISCONNECT_POLL_INTERVAL = 1.0
+
+
+def _sse_headers(query_id: str, thread_id: str) -> dict[str, str]:
+    return {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "X-Accel-Buffering": "no",  # nginx: flush events as they are produced
+        "X-Query-ID": query_id,
+        "X-Thread-ID": thread_id,
+        "Access-Control-Expose-Headers": "X-Query-ID, X-Thread-ID"
+    }
+
+
+def _sse(payload: dict) -> bytes:
+    """Frame one SSE data event; bytes go to the ASGI layer without re-encoding."""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+# Token events are the highest-volume frame; splice the fixed parts around the
+# varying values instead of building and encoding a dict per token
+_TOKEN_PREFIX = b'data: {"type":"token","content":'
+_TOKEN_TIMESTAMP = b',"timestamp":'
+
+
+@lru_cache(maxsize=256)
+def _tool_prefix(kind: str, tool: str) -> bytes:
+    """Frame bytes up to the timestamp for a tool event; tool names repeat across runs."""
+    return b'data: {"type":' + orjson.dumps(kind) + b',"tool":' + orjson.dumps(tool) + _TOKEN_TIMESTAMP
+
+
+def _sse_token(content: object, now: float) -> bytes:
+    """Same bytes as _sse({'type': 'token', 'content': content, 'timestamp': now})."""
+    return _TOKEN_PREFIX + orjson.dumps(content) + _TOKEN_TIMESTAMP + orjson.dumps(now) + b"}\n\n"
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifecycle manager for FastAPI app."""
     logger.info("🚀 Starting Travel Planning Assistant API")
+    # Pay first-request setup (RapidAPI TLS, Gemini prompt cache) in the
+    # background so startup itself is not delayed
+    warmup = asyncio.gather(warmup_http_client(), warmup_coordinator(), return_exceptions=True)
     yield
     logger.info("🛑 Shutting down Travel Planning Assistant API")
+    warmup.cancel()
+    await shutdown_tools()
 
 
 # Initialize FastAPI app
@@ -83,44 +186,146 @@ class ResumeRequest(BaseModel):
 
 # ============ SSE EVENT GENERATOR ============
 
+async def _pump_graph_events(
+    initial_state: dict, config: dict, events: asyncio.Queue, slots: asyncio.Semaphore
+) -> None:
+    """
+    Run the graph and feed its events into a queue.
+
+    Each graph event takes one of ``slots`` (released by the consumer), so a
+    slow client pauses the graph instead of letting the queue grow. A failure
+    (or cancellation) is queued as the exception itself, and the stream always
+    ends with _STREAM_END; these markers never wait for a slot.
+    """
+    try:
+        async with aclosing(travel_graph.astream_events(initial_state, config, version="v2")) as stream:
+            async for event in stream:
+                await slots.acquire()
+                events.put_nowait(event)
+    except asyncio.CancelledError as e:
+        events.put_nowait(e)
+        raise
+    except Exception as e:
+        events.put_nowait(e)
+    finally:
+        events.put_nowait(_STREAM_END)
+
+
+# Scalar starting values of every query's state (the containers are built
+# fresh per query in _initial_state, so requests never share them)
+_INITIAL_STATE_SCALARS: Mapping[str, Any] = MappingProxyType({
+    "should_interrupt": False,
+    "is_interrupted": False,
+    "status": "processing",
+    "current_agent": "",
+    "needs_continuation": False,
+})
+
+
+def _initial_state(user_query: str, query_id: str, thread_id: str) -> dict[str, Any]:
+    """Graph input for a new query on a thread."""
+    return {
+        **_INITIAL_STATE_SCALARS,
+        "messages": [HumanMessage(content=user_query)],
+        "user_query": user_query,
+        "query_id": query_id,
+        "thread_id": thread_id,
+        "previous_agents": [],
+        "agent_actions": [],
+        "partial_results": {},
+        "flight_context": {},
+        "hotel_context": {},
+        "coordinator_context": {},
+        "detected_intents": [],
+        "active_tool_calls": [],
+        "completed_tool_calls": [],
+    }
+
+
+# Shared read-only default for events without a data payload
+_NO_DATA: Mapping[str, Any] = MappingProxyType({})
+
+# Graph event -> SSE frames. Each handler returns the frames to send, all
+# stamped with the one clock reading taken for that event.
+
+def _on_chain_start(event_data: Mapping[str, Any], event_name: str, now: float) -> tuple[bytes, ...]:
+    # Agent started
+    if not _AGENT_NAME_RE.search(event_name):
+        return ()
+    return (_sse({'type': 'agent_start', 'agent': event_name, 'timestamp': now}),)
+
+
+def _on_chain_end(event_data: Mapping[str, Any], event_name: str, now: float) -> tuple[bytes, ...]:
+    # Agent completed
+    if not _AGENT_NAME_RE.search(event_name):
+        return ()
+    output = event_data.get("output")
+
+    # Extract messages/content safely whether output is dict or str
+    content_to_emit = None
+    if isinstance(output, dict):
+        messages = output.get("messages")
+        if messages:
+            last_message = messages[-1]
+            content_to_emit = last_message.content if hasattr(last_message, 'content') else str(last_message)
+    elif isinstance(output, str):
+        content_to_emit = output
+
+    frames = []
+    if content_to_emit:
+        frames.append(_sse({'type': 'agent_message', 'agent': event_name, 'content': content_to_emit, 'timestamp': now}))
+    # Send agent completion
+    frames.append(_sse({'type': 'agent_complete', 'agent': event_name, 'timestamp': now}))
+    return tuple(frames)
+
+
+def _on_chat_model_stream(event_data: Mapping[str, Any], event_name: str, now: float) -> tuple[bytes, ...]:
+    # LLM token streaming
+    content = getattr(event_data.get("chunk"), "content", None)
+    return (_sse_token(content, now),) if content else ()
+
+
+def _on_tool_start(event_data: Mapping[str, Any], event_name: str, now: float) -> tuple[bytes, ...]:
+    tool_input = event_data.get("input")
+    tool_name = (tool_input.get("tool", "") if isinstance(tool_input, dict) else "") or event_name
+    return (_tool_prefix("tool_start", tool_name) + orjson.dumps(now) + b"}\n\n",)
+
+
+def _on_tool_end(event_data: Mapping[str, Any], event_name: str, now: float) -> tuple[bytes, ...]:
+    return (_tool_prefix("tool_complete", event_name) + orjson.dumps(now) + b"}\n\n",)
+
+
+_EVENT_HANDLERS: Mapping[str, Callable[[Mapping[str, Any], str, float], tuple[bytes, ...]]] = MappingProxyType({
+    "on_chain_start": _on_chain_start,
+    "on_chain_end": _on_chain_end,
+    "on_chat_model_stream": _on_chat_model_stream,
+    "on_tool_start": _on_tool_start,
+    "on_tool_end": _on_tool_end,
+})
+
+
 async def generate_sse_events(
     query_id: str,
     user_query: str,
-    thread_id: str
-) -> AsyncGenerator[str, None]:
+    thread_id: str,
+    http_request: Request | None = None
+) -> AsyncGenerator[bytes, None]:
     """
     Generate Server-Sent Events from LangGraph execution.
     
     Streams agent actions, tool calls, and results in real-time.
-    Supports graceful interruption via interruption_flags.
+    The graph runs in its own task so /api/chat/cancel can cancel it mid-tool,
+    and it is stopped as well once http_request reports a client disconnect.
     """
+    graph_task: asyncio.Task | None = None
     try:
-        logger.info(f"📨 Starting SSE stream for query: {query_id}")
+        logger.info("📨 Starting SSE stream for query: %s", query_id)
         
         # Send initial status
-        yield f"data: {json.dumps({'type': 'start', 'query_id': query_id, 'timestamp': time.time()})}\n\n"
+        yield _sse({'type': 'start', 'query_id': query_id, 'timestamp': time.time()})
         
         # Prepare initial state
-        initial_state = {
-            "messages": [HumanMessage(content=user_query)],
-            "user_query": user_query,
-            "query_id": query_id,
-            "thread_id": thread_id,
-            "should_interrupt": False,
-            "is_interrupted": False,
-            "status": "processing",
-            "current_agent": "",
-            "previous_agents": [],
-            "agent_actions": [],
-            "partial_results": {},
-            "flight_context": {},
-            "hotel_context": {},
-            "coordinator_context": {},
-            "detected_intents": [],
-            "active_tool_calls": [],
-            "completed_tool_calls": [],
-            "needs_continuation": False
-        }
+        initial_state = _initial_state(user_query, query_id, thread_id)
         
         # Configuration for checkpointing
         config = {
@@ -130,98 +335,70 @@ async def generate_sse_events(
             "run_id": query_id
         }
         
-        # Track query
-        active_queries[query_id] = {
-            "thread_id": thread_id,
-            "query": user_query,
-            "start_time": time.time(),
-            "status": "active"
-        }
+        # Track query (the endpoints register it up front so it can be cancelled early)
+        entry = active_queries.setdefault(query_id, QueryEntry(thread_id, user_query))
         
         # Stream graph execution
-        async for event in travel_graph.astream_events(
-            initial_state,
-            config,
-            version="v2"
-        ):
-            # Check for interruption
-            if interruption_flags.get(query_id, False):
-                logger.info(f"⏸️ Query {query_id} interrupted")
-                yield f"data: {json.dumps({'type': 'interrupted', 'reason': 'User cancelled', 'timestamp': time.time()})}\n\n"
+        events: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(_SSE_QUEUE_MAXSIZE)
+        graph_task = asyncio.create_task(_pump_graph_events(initial_state, config, events, slots))
+        entry.task = graph_task
+        if entry.interrupted:
+            graph_task.cancel()
+
+        quiet_since = time.monotonic()
+        while True:
+            try:
+                event = events.get_nowait()
+            except asyncio.QueueEmpty:
+                try:
+                    event = await asyncio.wait_for(events.get(), _DISCONNECT_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Nothing to send: stop the graph if the tab is gone
+                    if http_request is not None and await http_request.is_disconnected():
+                        logger.info("🔌 Client for query %s disconnected", query_id)
+                        return
+                    # Keep proxies from closing the connection during a long node
+                    if time.monotonic() - quiet_since >= _SSE_PING_INTERVAL:
+                        quiet_since = time.monotonic()
+                        yield _SSE_PING
+                    continue
+            quiet_since = time.monotonic()
+            slots.release()
+            if event is _STREAM_END:
                 break
+            # Cancelled via /api/chat/cancel
+            if isinstance(event, asyncio.CancelledError):
+                logger.info("⏸️ Query %s interrupted", query_id)
+                yield _sse({'type': 'interrupted', 'reason': 'User cancelled', 'timestamp': time.time()})
+                break
+            if isinstance(event, Exception):
+                raise event
             
-            event_type = event.get("event")
-            event_data = event.get("data", {})
-            event_name = event.get("name", "")
-            
-            # Handle different event types
-            if event_type == "on_chain_start":
-                # Agent started
-                agent_name = event_name
-                if any(x in agent_name for x in ["coordinator", "flight", "hotel", "research"]):
-                    yield f"data: {json.dumps({'type': 'agent_start', 'agent': agent_name, 'timestamp': time.time()})}\n\n"
-            
-            elif event_type == "on_chain_end":
-                # Agent completed
-                agent_name = event_name
-                if any(x in agent_name for x in ["coordinator", "flight", "hotel", "research"]):
-                    output = event_data.get("output", {})
-
-                    # Extract messages/content safely whether output is dict or str
-                    content_to_emit = None
-                    if isinstance(output, dict):
-                        messages = output.get("messages", [])
-                        if messages:
-                            last_message = messages[-1]
-                            content_to_emit = last_message.content if hasattr(last_message, 'content') else str(last_message)
-                    elif isinstance(output, str):
-                        content_to_emit = output
-
-                    if content_to_emit:
-                        yield f"data: {json.dumps({'type': 'agent_message', 'agent': agent_name, 'content': content_to_emit, 'timestamp': time.time()})}\n\n"
-
-                    # Send agent completion
-                    yield f"data: {json.dumps({'type': 'agent_complete', 'agent': agent_name, 'timestamp': time.time()})}\n\n"
-            
-            elif event_type == "on_chat_model_stream":
-                # LLM token streaming
-                chunk = event_data.get("chunk", {})
-                if hasattr(chunk, 'content'):
-                    content = chunk.content
-                    if content:
-                        yield f"data: {json.dumps({'type': 'token', 'content': content, 'timestamp': time.time()})}\n\n"
-            
-            elif event_type == "on_tool_start":
-                # Tool execution started
-                tool_name = event_data.get("input", {}).get("tool", "") or event_name
-                yield f"data: {json.dumps({'type': 'tool_start', 'tool': tool_name, 'timestamp': time.time()})}\n\n"
-            
-            elif event_type == "on_tool_end":
-                # Tool execution completed
-                tool_name = event_name
-                output = event_data.get("output", {})
-                yield f"data: {json.dumps({'type': 'tool_complete', 'tool': tool_name, 'timestamp': time.time()})}\n\n"
-            
-            # Yield control to event loop
-            await asyncio.sleep(0)
+            # One dict lookup decides whether the event is relayed at all
+            handler = _EVENT_HANDLERS.get(event.get("event"))
+            if handler is not None:
+                for frame in handler(event.get("data", _NO_DATA), event.get("name", ""), time.time()):
+                    yield frame
         
         # Send completion event
-        logger.info(f"✅ Query {query_id} completed")
-        yield f"data: {json.dumps({'type': 'complete', 'query_id': query_id, 'timestamp': time.time()})}\n\n"
+        logger.info("✅ Query %s completed", query_id)
+        yield _sse({'type': 'complete', 'query_id': query_id, 'timestamp': time.time()})
     
     except asyncio.CancelledError:
-        logger.info(f"❌ Query {query_id} cancelled")
-        yield f"data: {json.dumps({'type': 'cancelled', 'query_id': query_id, 'timestamp': time.time()})}\n\n"
+        logger.info("❌ Query %s cancelled", query_id)
+        yield _sse({'type': 'cancelled', 'query_id': query_id, 'timestamp': time.time()})
     
     except Exception as e:
-        logger.error(f"❌ Error in query {query_id}: {str(e)}", exc_info=True)
-        yield f"data: {json.dumps({'type': 'error', 'message': str(e), 'timestamp': time.time()})}\n\n"
+        logger.error("❌ Error in query %s: %s", query_id, e, exc_info=True)
+        yield _sse({'type': 'error', 'message': str(e), 'timestamp': time.time()})
     
     finally:
-        # Cleanup
-        active_queries.pop(query_id, None)
-        interruption_flags.pop(query_id, None)
-        logger.info(f"🧹 Cleaned up query {query_id}")
+        # Cleanup (also stops the graph if the client disconnected)
+        if graph_task is not None and not graph_task.done():
+            graph_task.cancel()
+        _finish_query(query_id)
+        logger.info("🧹 Cleaned up query %s", query_id)
 
 
 # ============ API ENDPOINTS ============
@@ -261,9 +438,6 @@ async def api_hotels_search(
     Requires RAPIDAPI_KEY in environment.
     """
     try:
-        # Import inside function to avoid circular deps during startup
-        from tools import booking_search_hotels
-
         result = await booking_search_hotels.ainvoke({
             "dest_id": dest_id,
             "search_type": search_type,
@@ -310,8 +484,6 @@ async def api_flights_search(
     Requires RAPIDAPI_KEY in environment.
     """
     try:
-        from tools import search_flights
-
         result = await search_flights.ainvoke({
             "origin": fromId,
             "destination": toId,
@@ -328,14 +500,36 @@ async def api_flights_search(
 
         if result.get("status") == "error":
             raise HTTPException(status_code=400, detail=result)
-        return result
+        # raw_bytes duplicates "results"; don't send it to clients
+        return {k: v for k, v in result.items() if k != "raw_bytes"}
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _open_stream(query_id: str, user_query: str, thread_id: str, http_request: Request) -> StreamingResponse:
+    """Admit a new stream (429 when the process is saturated) and start its SSE response."""
+    try:
+        if _STREAM_SLOTS.locked():
+            await asyncio.wait_for(_STREAM_SLOTS.acquire(), _STREAM_ADMIT_TIMEOUT)
+        else:
+            await _STREAM_SLOTS.acquire()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=429, detail="Too many concurrent requests, please retry shortly") from None
+
+    # Registered before the response starts so it can be cancelled early
+    active_queries[query_id] = QueryEntry(thread_id, user_query, holds_slot=True)
+    return StreamingResponse(
+        generate_sse_events(query_id, user_query, thread_id, http_request),
+        media_type="text/event-stream",
+        headers=_sse_headers(query_id, thread_id),
+        # Backstop for a response whose body never ran (generator cleanup is skipped)
+        background=BackgroundTask(_finish_query, query_id)
+    )
+
+
 @app.post("/api/chat/stream")
-async def stream_chat(request: QueryRequest):
+async def stream_chat(request: QueryRequest, http_request: Request):
     """
     Stream agent responses via Server-Sent Events.
     
@@ -345,25 +539,12 @@ async def stream_chat(request: QueryRequest):
     3. Streams events in real-time
     4. Supports interruption via /api/chat/cancel
     """
-    query_id = str(uuid.uuid4())
-    thread_id = request.thread_id or str(uuid.uuid4())
+    query_id = uuid.uuid4().hex
+    thread_id = request.thread_id or uuid.uuid4().hex
     
-    # Initialize interruption flag
-    interruption_flags[query_id] = False
+    logger.info("🔵 New query: %s | Thread: %s | Query: %.50s...", query_id, thread_id, request.query)
     
-    logger.info(f"🔵 New query: {query_id} | Thread: {thread_id} | Query: {request.query[:50]}...")
-    
-    return StreamingResponse(
-        generate_sse_events(query_id, request.query, thread_id),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Query-ID": query_id,
-            "X-Thread-ID": thread_id,
-            "Access-Control-Expose-Headers": "X-Query-ID, X-Thread-ID"
-        }
-    )
+    return await _open_stream(query_id, request.query, thread_id, http_request)
 
 
 @app.post("/api/chat/cancel")
@@ -371,27 +552,27 @@ async def cancel_query(request: CancelRequest):
     """
     Cancel an active query gracefully.
     
-    Sets the interruption flag which is checked by agents during execution.
-    Preserves partial results for context transfer.
+    Sets the interruption flag and cancels the running graph task, so the
+    current node stops at its next await. Completed turns stay checkpointed.
     """
     query_id = request.query_id
+    entry = active_queries.get(query_id)
     
-    if query_id not in active_queries and query_id not in interruption_flags:
+    if entry is None:
         raise HTTPException(
             status_code=404,
             detail=f"Query {query_id} not found or already completed"
         )
     
-    # Set interruption flag
-    interruption_flags[query_id] = True
+    # Flag the interruption and stop the graph
+    entry.interrupted = True
+    entry.status = "interrupted"
+    entry.interrupt_time = time.time()
+    entry.interrupt_reason = request.reason
+    if entry.task is not None:
+        entry.task.cancel()
     
-    # Update query status
-    if query_id in active_queries:
-        active_queries[query_id]["status"] = "interrupted"
-        active_queries[query_id]["interrupt_time"] = time.time()
-        active_queries[query_id]["interrupt_reason"] = request.reason
-    
-    logger.info(f"⏸️ Interruption requested for query: {query_id} | Reason: {request.reason}")
+    logger.info("⏸️ Interruption requested for query: %s | Reason: %s", query_id, request.reason)
     
     return {
         "status": "interrupted",
@@ -408,10 +589,9 @@ async def get_query_status(query_id: str):
     
     Returns information about whether the query is active, interrupted, or completed.
     """
-    query_info = active_queries.get(query_id)
-    is_interrupted = interruption_flags.get(query_id, False)
+    entry = active_queries.get(query_id)
     
-    if not query_info and query_id not in interruption_flags:
+    if entry is None:
         return {
             "query_id": query_id,
             "status": "not_found",
@@ -420,43 +600,29 @@ async def get_query_status(query_id: str):
     
     return {
         "query_id": query_id,
-        "status": query_info.get("status") if query_info else "completed",
-        "is_active": query_id in active_queries,
-        "is_interrupted": is_interrupted,
-        "query_info": query_info
+        "status": entry.status,
+        "is_active": True,
+        "is_interrupted": entry.interrupted,
+        "query_info": entry.info()
     }
 
 
 @app.post("/api/chat/resume")
-async def resume_query(request: ResumeRequest):
+async def resume_query(request: ResumeRequest, http_request: Request):
     """
     Resume conversation after interruption.
     
     Uses the thread_id to retrieve previous state from checkpointer
     and continues with the new query while preserving context.
     """
-    query_id = str(uuid.uuid4())
+    query_id = uuid.uuid4().hex
     thread_id = request.thread_id
     
-    logger.info(f"🔄 Resuming thread: {thread_id} | New query: {request.query[:50]}...")
-    
-    # Clear any previous interruption flags for this thread
-    if request.previous_query_id:
-        interruption_flags.pop(request.previous_query_id, None)
-    
-    interruption_flags[query_id] = False
+    logger.info("🔄 Resuming thread: %s | New query: %.50s...", thread_id, request.query)
     
-    return StreamingResponse(
-        generate_sse_events(query_id, request.query, thread_id),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Query-ID": query_id,
-            "X-Thread-ID": thread_id,
-            "Access-Control-Expose-Headers": "X-Query-ID, X-Thread-ID"
-        }
-    )
+    # The previous query's entry is dropped when its stream ends, so there is
+    # no interruption state to clear for previous_query_id
+    return await _open_stream(query_id, request.query, thread_id, http_request)
 
 
 @app.get("/api/chat/history/{thread_id}")
@@ -468,7 +634,7 @@ async def get_chat_history(thread_id: str):
     """
     try:
         config = {"configurable": {"thread_id": thread_id}}
-        state_snapshot = travel_graph.get_state(config)
+        state_snapshot = await travel_graph.aget_state(config)
         
         if not state_snapshot or not state_snapshot.values:
             return {
@@ -481,13 +647,14 @@ async def get_chat_history(thread_id: str):
         messages = state.get("messages", [])
         
         # Format messages
-        formatted_messages = []
-        for msg in messages:
-            formatted_messages.append({
-                "role": msg.__class__.__name__,
+        formatted_messages = [
+            {
+                "role": type(msg).__name__,
                 "content": msg.content if hasattr(msg, 'content') else str(msg),
                 "timestamp": getattr(msg, 'timestamp', None)
-            })
+            }
+            for msg in messages
+        ]
         
         return {
             "thread_id": thread_id,
@@ -501,7 +668,7 @@ async def get_chat_history(thread_id: str):
         }
     
     except Exception as e:
-        logger.error(f"Error retrieving history for thread {thread_id}: {str(e)}")
+        logger.error("Error retrieving history for thread %s: %s", thread_id, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -512,7 +679,7 @@ async def health_check():
         "status": "healthy",
         "timestamp": time.time(),
         "active_queries": len(active_queries),
-        "interruption_flags": len(interruption_flags),
+        "interrupted_queries": sum(entry.interrupted for entry in active_queries.values()),
         "graph_status": "initialized"
     }
 
@@ -522,7 +689,7 @@ async def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     return {
         "error": "Internal server error",
         "message": str(exc),
@@ -532,7 +699,6 @@ async def global_exception_handler(request, exc):
 
 if __name__ == "__main__":
     import uvicorn
-    import os
     
     # Load environment variables
     from dotenv import load_dotenv
@@ -541,7 +707,7 @@ if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
     
-    logger.info(f"🚀 Starting server on {host}:{port}")
+    logger.info("🚀 Starting server on %s:%s", host, port)
     
     uvicorn.run(
         "main:app",
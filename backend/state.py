@@ -7,10 +7,29 @@ from typing import Annotated, Optional, Any
 from pydantic import BaseModel, Field
 from langgraph.graph import MessagesState
 from langchain_core.messages import BaseMessage
-import operator
 
+# Cap on audit-trail entries kept per thread (agent hops, actions, tool calls)
+AUDIT_TRAIL_LIMIT = 256
+# Sliding window of chat messages kept per thread (~20 turns of query,
+# routing note and agent reply); agents only read recent turns
+MESSAGE_WINDOW = 60
 
-class AgentState(MessagesState):
+
+def bounded_append(limit: int):
+    """
+    Build a reducer that appends node updates to a list, keeping only the newest entries.
+    
+    Agents return just the entries they add; the reducer extends the stored list
+    and drops the oldest items once ``limit`` is exceeded, so long-lived threads
+    don't grow their checkpoints without bound.
+    """
+    def reducer(left: Optional[list], right: Optional[list]) -> list:
+        merged = [*(left or []), *(right or [])]
+        return merged[-limit:]
+    return reducer
+
+
+class AgentState(MessagesState, total=False):
     """
     Complete multi-agent state with interruption handling.
     
@@ -21,76 +40,53 @@ class AgentState(MessagesState):
     - Request interruption and cancellation
     - Partial result preservation
     - Context transfer between agents
+    
+    A TypedDict, so LangGraph passes it between nodes without validation. Every
+    key is optional; starting values come from the initial state in main.py and
+    agents read them with ``state.get(key, default)``.
     """
     
-    # Messages and conversation history (inherited from MessagesState)
-    messages: Annotated[list[BaseMessage], operator.add]
+    # Messages and conversation history (inherited from MessagesState), windowed
+    messages: Annotated[list[BaseMessage], bounded_append(MESSAGE_WINDOW)]
     
     # Agent coordination
-    current_agent: str = Field(default="coordinator", description="Currently active agent")
-    next_agent: str = Field(default="", description="Agent to route to next")
-    previous_agents: list[str] = Field(default_factory=list, description="History of agent activations")
+    current_agent: str  # Currently active agent
+    next_agent: str  # Agent to route to next
+    previous_agents: Annotated[list[str], bounded_append(AUDIT_TRAIL_LIMIT)]  # History of agent activations
     
     # User query metadata
-    user_query: str = Field(default="", description="Current user query")
-    original_query: str = Field(default="", description="Original query before interruption")
-    query_id: str = Field(default="", description="Unique query identifier")
-    thread_id: str = Field(default="", description="Conversation thread identifier")
+    user_query: str  # Current user query
+    original_query: str  # Original query before interruption
+    query_id: str  # Unique query identifier
+    thread_id: str  # Conversation thread identifier
     
     # Interruption handling - CRITICAL for request cancellation
-    should_interrupt: bool = Field(default=False, description="Flag to trigger graceful interruption")
-    is_interrupted: bool = Field(default=False, description="Whether current operation was interrupted")
-    interrupt_reason: str = Field(default="", description="Reason for interruption")
-    interrupt_timestamp: Optional[float] = Field(default=None, description="When interruption occurred")
+    should_interrupt: bool  # Flag to trigger graceful interruption
+    is_interrupted: bool  # Whether current operation was interrupted
+    interrupt_reason: str  # Reason for interruption
+    interrupt_timestamp: Optional[float]  # When interruption occurred
     
-    # Partial results preservation
-    partial_results: dict[str, Any] = Field(
-        default_factory=dict,
-        description="Preserved partial results from interrupted operations"
-    )
+    # Partial results preserved from interrupted operations
+    partial_results: dict[str, Any]
     
     # Agent-specific context (persists across interruptions)
-    flight_context: dict[str, Any] = Field(
-        default_factory=dict,
-        description="Flight search context and history"
-    )
-    hotel_context: dict[str, Any] = Field(
-        default_factory=dict,
-        description="Hotel search context and history"
-    )
-    coordinator_context: dict[str, Any] = Field(
-        default_factory=dict,
-        description="Coordinator routing context"
-    )
+    flight_context: dict[str, Any]  # Flight search context and history
+    hotel_context: dict[str, Any]  # Hotel search context and history
+    coordinator_context: dict[str, Any]  # Coordinator routing context
     
     # Status tracking for streaming updates
-    status: str = Field(default="processing", description="Current operation status")
-    agent_actions: list[dict[str, Any]] = Field(
-        default_factory=list,
-        description="Track all agent actions for debugging"
-    )
+    status: str  # Current operation status
+    agent_actions: Annotated[list[dict[str, Any]], bounded_append(AUDIT_TRAIL_LIMIT)]  # All agent actions, for debugging
     
     # Tool call tracking
-    active_tool_calls: list[str] = Field(
-        default_factory=list,
-        description="Currently executing tools"
-    )
-    completed_tool_calls: list[dict[str, Any]] = Field(
-        default_factory=list,
-        description="History of completed tool calls"
-    )
+    active_tool_calls: Annotated[list[str], bounded_append(AUDIT_TRAIL_LIMIT)]  # Currently executing tools
+    completed_tool_calls: Annotated[list[dict[str, Any]], bounded_append(AUDIT_TRAIL_LIMIT)]  # History of completed tool calls
     
-    # User intent analysis
-    detected_intents: list[str] = Field(
-        default_factory=list,
-        description="Detected user intents (flight, hotel, general)"
-    )
+    # User intent analysis (flight, hotel, general)
+    detected_intents: list[str]
     
     # Continuation flag for seamless handoffs
-    needs_continuation: bool = Field(
-        default=False,
-        description="Whether conversation needs continuation from previous context"
-    )
+    needs_continuation: bool  # Whether conversation needs continuation from previous context
 
 
 class QueryMetadata(BaseModel):
@@ -110,3 +106,11 @@ class InterruptionContext(BaseModel):
     timestamp: float
     reason: str
     preserved_state: dict[str, Any] = Field(default_factory=dict)
+
+
+class RoutingDecision(BaseModel):
+    """Coordinator routing JSON returned by the LLM (unknown keys are ignored)."""
+    intent: Optional[str] = "general"
+    confidence: Optional[float] = None
+    details: Optional[dict[str, Any]] = None
+    reasoning: Optional[str] = ""
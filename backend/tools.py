@@ -5,14 +5,18 @@ Each tool supports interruption checking for graceful cancellation.
 
 import os
 import time
-import json
 import httpx
+import orjson
 import asyncio
+import hashlib
+import importlib.util
+import itertools
+from collections import OrderedDict
 from pathlib import Path
 
 from dotenv import load_dotenv
 from langchain_core.tools import tool
-from typing import Optional, Any, Dict, Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 # Load env so RAPIDAPI_KEY is available
 load_dotenv()
@@ -20,22 +24,143 @@ project_root = Path(__file__).resolve().parents[1]
 load_dotenv(project_root / ".env.local", override=False)
 
 # --- Lightweight in-memory cache (process-local) ---
-_CACHE: dict[Tuple[str, str], Tuple[float, Any]] = {}
+# LRU-bounded: every distinct search adds a key, and expiry alone only frees
+# entries that get looked up again. Values are (expires_at, value) on the
+# monotonic clock, so wall-clock adjustments can't extend or cut short a TTL.
+_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+_CACHE_MAX_ENTRIES = max(1, int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "4096")))
+_CACHE_SWEEP_INTERVAL_SEC = 60.0
+_CACHE_SWEEPER: Optional["asyncio.Task[None]"] = None
 _TTL_SEC = 15 * 60  # 15 minutes
 
+# Per-endpoint freshness: prices move quickly, ids and descriptions barely at all
+_FLIGHT_TTL_SEC = 10 * 60
+_HOTEL_TTL_SEC = 5 * 60
+_DEST_TTL_SEC = 24 * 60 * 60
+_ATTR_TTL_SEC = 30 * 60
+_ATTR_DETAILS_TTL_SEC = 6 * 60 * 60
+# Upstream 4xx rejections are remembered briefly so retries of a bad query don't
+# each hit RapidAPI. Auth/quota (401/403/429) and 5xx are left uncached: the
+# next key or a recovered supplier may well answer.
+_NEGATIVE_TTL_SEC = 30
+# Bytes of the raw response body kept with keep_raw results (callers log ~4000)
+_RAW_LOG_BYTES = 4096
+
 def _cache_get(key: Tuple[str, str]):
-    now = time.time()
+    now = time.monotonic()
     item = _CACHE.get(key)
     if not item:
         return None
-    ts, val = item
-    if now - ts > _TTL_SEC:
+    expires_at, val = item
+    if now > expires_at:
         _CACHE.pop(key, None)
         return None
+    _CACHE.move_to_end(key)
     return val
 
-def _cache_set(key: Tuple[str, str], value: Any):
-    _CACHE[key] = (time.time(), value)
+def _cache_set(key: Tuple[str, str], value: Any, ttl: float = _TTL_SEC):
+    _CACHE[key] = (time.monotonic() + ttl, value)
+    _CACHE.move_to_end(key)
+    if len(_CACHE) > _CACHE_MAX_ENTRIES:
+        _CACHE.popitem(last=False)
+    _ensure_cache_sweeper()
+
+async def _sweep_cache() -> None:
+    """Periodically drop expired entries that are never read again."""
+    while True:
+        await asyncio.sleep(_CACHE_SWEEP_INTERVAL_SEC)
+        now = time.monotonic()
+        for key in [k for k, (expires_at, _) in _CACHE.items() if now > expires_at]:
+            del _CACHE[key]
+
+def _ensure_cache_sweeper() -> None:
+    global _CACHE_SWEEPER
+    if _CACHE_SWEEPER is None or _CACHE_SWEEPER.done():
+        _CACHE_SWEEPER = asyncio.get_running_loop().create_task(_sweep_cache())
+
+def _cache_failure(key: Tuple[str, str], res: dict[str, Any]) -> dict[str, Any]:
+    code = res.get("code")
+    if isinstance(code, int) and 400 <= code < 500 and code not in (401, 403, 429):
+        _cache_set(key, res, ttl=_NEGATIVE_TTL_SEC)
+    return res
+
+# --- Optional shared cache (Redis) ---
+# With REDIS_URL set and redis installed, successful RapidAPI results are also
+# written to Redis so every worker process can reuse them; _CACHE stays the
+# first tier and single-flight still collapses same-process duplicates.
+_REDIS: Any = None
+_REDIS_URL = os.getenv("REDIS_URL", "").strip()
+if _REDIS_URL and importlib.util.find_spec("redis") is not None:
+    import redis.asyncio as _redis_asyncio
+
+    _REDIS = _redis_asyncio.Redis.from_url(_REDIS_URL)
+_REDIS_KEY_PREFIX = "rapi:v1:"
+
+
+def _redis_key(key: Tuple[str, str]) -> str:
+    return _REDIS_KEY_PREFIX + key[0] + ":" + hashlib.blake2b(key[1].encode(), digest_size=16).hexdigest()
+
+
+async def _shared_cache_get(key: Tuple[str, str]) -> Optional[dict[str, Any]]:
+    """Look a result up in Redis, copying a hit into _CACHE for its remaining TTL."""
+    if _REDIS is None:
+        return None
+    rkey = _redis_key(key)
+    try:
+        async with _REDIS.pipeline(transaction=False) as pipe:
+            raw, remaining = await pipe.get(rkey).ttl(rkey).execute()
+    except Exception:
+        return None  # Redis is only an optimization; fall through to RapidAPI
+    if not raw or remaining <= 0:
+        return None
+    value = orjson.loads(raw)
+    _cache_set(key, value, ttl=remaining)
+    return value
+
+
+async def _shared_cache_set(key: Tuple[str, str], value: dict[str, Any], ttl: float) -> None:
+    if _REDIS is None:
+        return
+    # raw_bytes is a log-only convenience and not JSON-serializable
+    shared = {k: v for k, v in value.items() if k != "raw_bytes"}
+    try:
+        await _REDIS.set(_redis_key(key), orjson.dumps(shared), ex=max(1, int(ttl)))
+    except Exception:
+        pass
+
+# In-flight upstream requests, keyed like _CACHE, so concurrent identical misses share one call
+_INFLIGHT: dict[Tuple[str, str], "asyncio.Task[Any]"] = {}
+# Callers still awaiting each in-flight task
+_INFLIGHT_WAITERS: dict["asyncio.Task[Any]", int] = {}
+
+
+def _drop_inflight(key: Tuple[str, str], task: "asyncio.Task[Any]") -> None:
+    # Only if still registered: a newer fetch may already own the key
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+
+
+async def _single_flight(key: Tuple[str, str], factory: Callable[[], Awaitable[Any]]) -> Any:
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(factory())
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda t: _drop_inflight(key, t))
+    _INFLIGHT_WAITERS[task] = _INFLIGHT_WAITERS.get(task, 0) + 1
+    try:
+        # Shield so one cancelled caller doesn't cancel the request for the others
+        return await asyncio.shield(task)
+    finally:
+        left = _INFLIGHT_WAITERS.pop(task) - 1
+        if left:
+            _INFLIGHT_WAITERS[task] = left
+        elif not task.done():
+            # Every caller was cancelled (e.g. the user stopped the query):
+            # abort the upstream request instead of letting it run to the timeout.
+            # Unregister it now so a caller arriving before the cancellation
+            # completes starts a fresh fetch rather than joining a dying one.
+            _drop_inflight(key, task)
+            task.cancel()
 
 def _keys_from_env() -> list[str]:
     # Allow multiple keys separated by commas
@@ -44,40 +169,173 @@ def _keys_from_env() -> list[str]:
         return []
     return [k.strip() for k in raw.split(",") if k.strip()]
 
-async def _rapidapi_get(url: str, params: dict) -> dict[str, Any]:
-    keys = _keys_from_env()
+# Parsed once; call refresh_keys() after changing RAPIDAPI_KEY at runtime
+_API_KEYS: list[str] = _keys_from_env()
+
+# --- Shared HTTP connection pool ---
+# One long-lived client keeps TCP/TLS connections to RapidAPI warm across the
+# chained flight -> destination -> hotels calls. HTTP/2 is used when h2 is installed.
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+_HTTP2 = importlib.util.find_spec("h2") is not None
+# Cap concurrent RapidAPI requests so parallel agent fan-out doesn't trip 429s
+_RAPIDAPI_SEM = asyncio.Semaphore(max(1, int(os.getenv("RAPIDAPI_MAX_CONCURRENCY", "8"))))
+
+
+def _http_client() -> httpx.AsyncClient:
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            # Fail fast on an unreachable host; the full 30s is for slow searches
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=60.0),
+            headers={"x-rapidapi-host": "booking-com15.p.rapidapi.com"},
+            http2=_HTTP2,
+        )
+    return _HTTP_CLIENT
+
+
+async def warmup_http_client() -> None:
+    """Open a pooled connection to RapidAPI ahead of the first search (called on app startup)."""
+    if not _API_KEYS:
+        return
+    try:
+        # Unauthenticated HEAD: pays DNS + TCP/TLS now, uses no API quota
+        await _http_client().head("https://booking-com15.p.rapidapi.com/", timeout=5)
+    except httpx.HTTPError:
+        pass  # best effort; the first real request simply connects itself
+
+
+async def aclose_http_client() -> None:
+    """Close the shared HTTP client (called on app shutdown)."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
+async def shutdown_tools() -> None:
+    """Cancel the cache sweeper and in-flight fetches, then close the HTTP client (app shutdown)."""
+    global _CACHE_SWEEPER
+    pending = [t for t in (_CACHE_SWEEPER, *_INFLIGHT.values()) if t is not None and not t.done()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    _CACHE_SWEEPER = None
+    await aclose_http_client()
+    if _REDIS is not None:
+        await _REDIS.aclose()
+
+
+# Keys are tried from a rotating start so quota is spread across all of them,
+# and a key that was rate-limited or rejected sits out until its cooldown ends
+_KEY_RR = itertools.count()
+_KEY_COOLDOWN_UNTIL: dict[str, float] = {}
+_KEY_RATE_LIMIT_COOLDOWN_SEC = 30.0
+_KEY_AUTH_COOLDOWN_SEC = 5 * 60.0
+
+
+def refresh_keys() -> None:
+    """Re-read RAPIDAPI_KEY, dropping cooldowns of keys that were removed."""
+    global _API_KEYS
+    _API_KEYS = _keys_from_env()
+    for key in _KEY_COOLDOWN_UNTIL.keys() - set(_API_KEYS):
+        del _KEY_COOLDOWN_UNTIL[key]
+
+
+def _keys_in_rotation(keys: list[str]) -> list[str]:
+    start = next(_KEY_RR) % len(keys)
+    rotated = keys[start:] + keys[:start]
+    now = time.monotonic()
+    ready = [k for k in rotated if _KEY_COOLDOWN_UNTIL.get(k, 0.0) <= now]
+    # Everything cooling down: still try rather than fail without a request
+    return ready or rotated
+
+
+def _key_cooldown(resp: httpx.Response) -> float:
+    if resp.status_code != 429:
+        return _KEY_AUTH_COOLDOWN_SEC
+    try:
+        return float(resp.headers.get("retry-after", _KEY_RATE_LIMIT_COOLDOWN_SEC))
+    except ValueError:  # HTTP-date form
+        return _KEY_RATE_LIMIT_COOLDOWN_SEC
+
+
+async def _rapidapi_get(url: str | httpx.URL, params: Optional[dict] = None) -> dict[str, Any]:
+    keys = _API_KEYS
     if not keys:
         return {"status": "error", "message": "RAPIDAPI_KEY not set in environment"}
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        last_error: dict[str, Any] | None = None
-        for key in keys:
-            headers = {
-                "x-rapidapi-host": "booking-com15.p.rapidapi.com",
-                "x-rapidapi-key": key,
-            }
-            resp = await client.get(url, params=params, headers=headers)
-            ct = resp.headers.get("content-type", "")
-            data = resp.json() if ct.startswith("application/json") else {"raw": resp.text}
-            if resp.status_code == 200:
-                return {"status": "success", "data": data}
-            # If 429 or auth/quota issue, try next key
-            if resp.status_code in (401, 403, 429):
-                last_error = {
-                    "status": "error",
-                    "code": resp.status_code,
-                    "message": (data.get("message") if isinstance(data, dict) else "HTTP error"),
-                    "response": data,
-                }
-                continue
-            # Other errors: return immediately
-            return {
+    client = _http_client()
+    last_error: dict[str, Any] | None = None
+    for key in _keys_in_rotation(keys):
+        async with _RAPIDAPI_SEM:
+            resp = await client.get(url, params=params, headers={"x-rapidapi-key": key})
+        ct = resp.headers.get("content-type", "")
+        data = orjson.loads(resp.content) if ct.startswith("application/json") else {"raw": resp.text}
+        if resp.status_code == 200:
+            return {"status": "success", "data": data, "raw": resp.content}
+        # If 429 or auth/quota issue, bench this key and try the next
+        if resp.status_code in (401, 403, 429):
+            _KEY_COOLDOWN_UNTIL[key] = time.monotonic() + _key_cooldown(resp)
+            last_error = {
                 "status": "error",
                 "code": resp.status_code,
                 "message": (data.get("message") if isinstance(data, dict) else "HTTP error"),
                 "response": data,
             }
-        return last_error or {"status": "error", "message": "All RapidAPI keys failed"}
+            continue
+        # Other errors: return immediately
+        return {
+            "status": "error",
+            "code": resp.status_code,
+            "message": (data.get("message") if isinstance(data, dict) else "HTTP error"),
+            "response": data,
+        }
+    return last_error or {"status": "error", "message": "All RapidAPI keys failed"}
+
+async def _cached_rapidapi(
+    cache_key: Tuple[str, str],
+    url: str,
+    params: Dict[str, Any],
+    ttl: float,
+    keep_raw: bool = False,
+) -> Dict[str, Any]:
+    """Serve a RapidAPI GET from the cache, or fetch it once for all concurrent callers.
+
+    Successes are wrapped as {"status", "query", "results"} and cached for
+    ``ttl``; upstream errors go through the short negative cache.
+    """
+    cached = _cache_get(cache_key)
+    if cached:
+        return cached
+
+    async def _fetch() -> Dict[str, Any]:
+        try:
+            shared = await _shared_cache_get(cache_key)
+            if shared:
+                return shared
+            res = await _rapidapi_get(url, params)
+            if res.get("status") != "success":
+                return _cache_failure(cache_key, res)
+            out: Dict[str, Any] = {
+                "status": "success",
+                "query": params,
+                "results": res.get("data"),
+            }
+            if keep_raw:
+                # Raw body prefix lets callers log without re-serializing; the
+                # full body would double the cached size of every large response
+                out["raw_bytes"] = res.get("raw")[:_RAW_LOG_BYTES]
+            _cache_set(cache_key, out, ttl=ttl)
+            await _shared_cache_set(cache_key, out, ttl)
+            return out
+        except httpx.RequestError as e:
+            return {"status": "error", "message": f"Network error: {e}"}
+        except Exception as e:
+            return {"status": "error", "message": f"Unexpected error: {e}"}
+
+    return await _single_flight(cache_key, _fetch)
+
 
 @tool
 async def search_flights(
@@ -103,11 +361,12 @@ async def search_flights(
     if interruption_check and interruption_check.get("should_interrupt"):
         return {"status": "interrupted", "message": "Flight search was cancelled"}
 
-    # Cache key by main parameters
-    cache_key = ("flights", f"{origin}|{destination}|{date}|{passengers}|{stops}|{pageNo}|{sort}|{cabinClass}|{currency_code}")
-    cached = _cache_get(cache_key)
-    if cached:
-        return cached
+    # Canonicalize inputs so "bom.airport " and "BOM.AIRPORT" share a cache entry
+    origin = (origin or "").strip().upper()
+    destination = (destination or "").strip().upper()
+    date = (date or "").strip()
+    passengers = max(1, min(int(passengers), 9))
+    currency_code = currency_code.strip().upper()
 
     if not origin or not destination:
         return {"status": "error", "message": "origin (fromId) and destination (toId) are required"}
@@ -131,39 +390,20 @@ async def search_flights(
     if children:
         params["children"] = children
 
-    try:
-        res = await _rapidapi_get(base_url, params)
-        if res.get("status") != "success":
-            return res
-        out = {"status": "success", "query": params, "results": res.get("data")}
-        _cache_set(cache_key, out)
-        return out
-    except httpx.RequestError as e:
-        return {"status": "error", "message": f"Network error: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {e}"}
+    # Keyed on the exact request (params are built in a fixed order), so
+    # round-trip and child searches no longer collide with one-way ones
+    cache_key = ("flights", orjson.dumps(params).decode())
+    return await _cached_rapidapi(cache_key, base_url, params, _FLIGHT_TTL_SEC, keep_raw=True)
 
 @tool
 async def booking_search_destination(query: str) -> dict[str, Any]:
-    """Search destination IDs for hotels via RapidAPI (hotels/searchDestination)."""
-    base_url = "https://booking-com15.p.rapidapi.com/api/v1/hotels/searchDestination"
-    params = {"query": query}
+    """Search destination IDs for hotels via RapidAPI (hotels/searchDestination).
 
-    try:
-        cache_key = ("dest", query)
-        cached = _cache_get(cache_key)
-        if cached:
-            return cached
-        res = await _rapidapi_get(base_url, params)
-        if res.get("status") != "success":
-            return res
-        out = {"status": "success", "results": res.get("data")}
-        _cache_set(cache_key, out)
-        return out
-    except httpx.RequestError as e:
-        return {"status": "error", "message": f"Network error: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {e}"}
+    Cached per normalized query for a day; destination ids rarely change.
+    """
+    cache_key = ("dest", " ".join(query.split()).lower())
+    base_url = "https://booking-com15.p.rapidapi.com/api/v1/hotels/searchDestination"
+    return await _cached_rapidapi(cache_key, base_url, {"query": query.strip()}, _DEST_TTL_SEC)
 
 @tool
 async def booking_search_hotels(
@@ -193,20 +433,21 @@ async def booking_search_hotels(
         return {"status": "interrupted", "message": "Hotel search cancelled"}
 
     base_url = "https://booking-com15.p.rapidapi.com/api/v1/hotels/searchHotels"
+    # Canonical values so equivalent searches (int vs str id, case, padding) share a cache entry
     params: Dict[str, Any] = {
-        "dest_id": dest_id,
-        "search_type": search_type,
-        "arrival_date": arrival_date,
-        "departure_date": departure_date,
-        "adults": adults,
-        "room_qty": room_qty,
+        "dest_id": str(dest_id).strip(),
+        "search_type": search_type.strip().upper(),
+        "arrival_date": arrival_date.strip(),
+        "departure_date": departure_date.strip(),
+        "adults": max(1, int(adults)),
+        "room_qty": max(1, int(room_qty)),
         "page_number": page_number,
         "price_min": price_min,
         "price_max": price_max,
         "units": units,
         "temperature_unit": temperature_unit,
-        "languagecode": languagecode,
-        "currency_code": currency_code,
+        "languagecode": languagecode.strip().lower(),
+        "currency_code": currency_code.strip().upper(),
     }
     if children_age:
         params["children_age"] = children_age
@@ -217,48 +458,70 @@ async def booking_search_hotels(
     if location:
         params["location"] = location
 
-    try:
-        cache_key = ("hotels", json.dumps(params, sort_keys=True))
-        cached = _cache_get(cache_key)
-        if cached:
-            return cached
-
-        res = await _rapidapi_get(base_url, params)
-        if res.get("status") != "success":
-            return res
-        out: Dict[str, Any] = {
-            "status": "success",
-            "query": params,
-            "results": res.get("data"),
-        }
-        _cache_set(cache_key, out)
-        return out
-    except httpx.RequestError as e:
-        return {"status": "error", "message": f"Network error: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {e}"}
-
-@tool
-async def booking_search_destination(query: str) -> dict[str, Any]:
-    """Search destination IDs for hotels via RapidAPI (hotels/searchDestination)."""
-    base_url = "https://booking-com15.p.rapidapi.com/api/v1/hotels/searchDestination"
-    params = {"query": query}
-
-    try:
-        cache_key = ("dest", query)
-        cached = _cache_get(cache_key)
-        if cached:
-            return cached
-        res = await _rapidapi_get(base_url, params)
-        if res.get("status") != "success":
-            return res
-        out = {"status": "success", "results": res.get("data")}
-        _cache_set(cache_key, out)
-        return out
-    except httpx.RequestError as e:
-        return {"status": "error", "message": f"Network error: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {e}"}
+    # Built in a fixed order (optional keys appended in a fixed order), so no key sort needed
+    cache_key = ("hotels", orjson.dumps(params).decode())
+    return await _cached_rapidapi(cache_key, base_url, params, _HOTEL_TTL_SEC)
+
+
+# The mock tools sleep to mimic a real search (handy for demoing interruption);
+# SIMULATE_TOOL_LATENCY=0 returns their canned data immediately
+_SIMULATE_LATENCY = os.getenv("SIMULATE_TOOL_LATENCY", "1") != "0"
+
+# Static parts of the mock hotel records; search_hotels adds the location
+_MOCK_HOTELS: Tuple[Dict[str, Any], ...] = (
+    {
+        "id": "H001",
+        "name": "Grand Plaza Hotel",
+        "rating": 4.5,
+        "reviews_count": 1243,
+        "price_per_night": 189,
+        "currency": "USD",
+        "amenities": ("Pool", "Gym", "Free WiFi", "Breakfast Included", "Parking"),
+        "room_type": "Deluxe King",
+        "image_url": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800&q=80",
+        "distance_from_center": "0.5 miles"
+    },
+    {
+        "id": "H002",
+        "name": "Coastal View Resort",
+        "rating": 4.7,
+        "reviews_count": 892,
+        "price_per_night": 249,
+        "currency": "USD",
+        "amenities": ("Beach Access", "Spa", "Restaurant", "Bar", "Concierge"),
+        "room_type": "Ocean View Suite",
+        "image_url": "https://images.unsplash.com/photo-1542314831-068cd1dbfeeb?w=800&q=80",
+        "distance_from_center": "2.1 miles"
+    },
+    {
+        "id": "H003",
+        "name": "Downtown Business Inn",
+        "rating": 4.2,
+        "reviews_count": 567,
+        "price_per_night": 129,
+        "currency": "USD",
+        "amenities": ("Free WiFi", "Business Center", "Airport Shuttle", "Coffee"),
+        "room_type": "Standard Queen",
+        "image_url": "https://images.unsplash.com/photo-1551882547-ff40c63fe5fa?w=800&q=80",
+        "distance_from_center": "0.2 miles"
+    },
+)
+
+# Mock web results as (title template, url, snippet, source)
+_MOCK_SEARCH_RESULTS: Tuple[Tuple[str, str, str, str], ...] = (
+    (
+        "Travel Guide: {}",
+        "https://example.com/travel-guide",
+        "Comprehensive travel information and tips for your destination...",
+        "TravelGuide.com",
+    ),
+    (
+        "Best Time to Visit - {}",
+        "https://example.com/best-time",
+        "Find out the best season and weather conditions for your trip...",
+        "WeatherTravel.com",
+    ),
+)
 
 
 @tool
@@ -291,7 +554,8 @@ async def search_hotels(
         }
     
     # Simulate API call
-    await asyncio.sleep(0.5)
+    if _SIMULATE_LATENCY:
+        await asyncio.sleep(0.5)
     
     # Check interruption mid-operation
     if interruption_check and interruption_check.get("should_interrupt"):
@@ -302,47 +566,7 @@ async def search_hotels(
         }
     
     # Mock hotel data
-    hotels = [
-        {
-            "id": "H001",
-            "name": "Grand Plaza Hotel",
-            "location": location,
-            "rating": 4.5,
-            "reviews_count": 1243,
-            "price_per_night": 189,
-            "currency": "USD",
-            "amenities": ["Pool", "Gym", "Free WiFi", "Breakfast Included", "Parking"],
-            "room_type": "Deluxe King",
-            "image_url": "https://images.unsplash.com/photo-1566073771259-6a8506099945?w=800&q=80",
-            "distance_from_center": "0.5 miles"
-        },
-        {
-            "id": "H002",
-            "name": "Coastal View Resort",
-            "location": location,
-            "rating": 4.7,
-            "reviews_count": 892,
-            "price_per_night": 249,
-            "currency": "USD",
-            "amenities": ["Beach Access", "Spa", "Restaurant", "Bar", "Concierge"],
-            "room_type": "Ocean View Suite",
-            "image_url": "https://images.unsplash.com/photo-1542314831-068cd1dbfeeb?w=800&q=80",
-            "distance_from_center": "2.1 miles"
-        },
-        {
-            "id": "H003",
-            "name": "Downtown Business Inn",
-            "location": location,
-            "rating": 4.2,
-            "reviews_count": 567,
-            "price_per_night": 129,
-            "currency": "USD",
-            "amenities": ["Free WiFi", "Business Center", "Airport Shuttle", "Coffee"],
-            "room_type": "Standard Queen",
-            "image_url": "https://images.unsplash.com/photo-1551882547-ff40c63fe5fa?w=800&q=80",
-            "distance_from_center": "0.2 miles"
-        }
-    ]
+    hotels = [{**hotel, "location": location} for hotel in _MOCK_HOTELS]
     
     return {
         "status": "success",
@@ -383,121 +607,119 @@ async def web_search(
         }
     
     # Simulate search
-    await asyncio.sleep(0.3)
+    if _SIMULATE_LATENCY:
+        await asyncio.sleep(0.3)
     
-    # Mock search results
+    # Mock search results (only the ones returned are built)
     results = [
-        {
-            "title": f"Travel Guide: {query}",
-            "url": "https://example.com/travel-guide",
-            "snippet": "Comprehensive travel information and tips for your destination...",
-            "source": "TravelGuide.com"
-        },
-        {
-            "title": f"Best Time to Visit - {query}",
-            "url": "https://example.com/best-time",
-            "snippet": "Find out the best season and weather conditions for your trip...",
-            "source": "WeatherTravel.com"
-        }
+        {"title": title.format(query), "url": url, "snippet": snippet, "source": source}
+        for title, url, snippet, source in _MOCK_SEARCH_RESULTS[:max_results]
     ]
     
     return {
         "status": "success",
         "query": query,
-        "results": results[:max_results],
-        "count": len(results),
+        "results": results,
+        "count": len(_MOCK_SEARCH_RESULTS),
         "search_timestamp": time.time()
     }
 
 
-@tool
-async def search_attractions(
-    location: str,
-    interruption_check: Optional[dict] = None
-) -> dict[str, Any]:
-    """Search attractions for a city using Booking.com attractions API.
+# Static parts of the mock attraction cards as (name prefix, fields); the city is added per call
+_MOCK_ATTRACTIONS: Tuple[Tuple[str, Dict[str, Any]], ...] = (
+    (
+        "City Highlights Tour - ",
+        {
+            "rating": 4.7,
+            "reviews": 1200,
+            "price": {"amount": 35, "currency": "USD"},
+            "duration": "4h",
+            "imageUrl": None,
+        },
+    ),
+    (
+        "Old Town Walking Tour - ",
+        {
+            "rating": 4.5,
+            "reviews": 840,
+            "price": {"amount": 20, "currency": "USD"},
+            "duration": "3h",
+            "imageUrl": None,
+        },
+    ),
+)
 
-    Tries the real Booking attractions endpoints and falls back to sample data
-    if the API call fails or returns no attractions, so the UI can always
-    render cards for demos.
-    """
 
-    if interruption_check and interruption_check.get("should_interrupt"):
-        return {
-            "status": "interrupted",
-            "message": "Attraction search was cancelled",
-            "partial_results": interruption_check.get("partial_results", {}),
-        }
+def _mock_attractions(city: str) -> dict[str, Any]:
+    demo = [{"name": prefix + city, **fields, "location": city} for prefix, fields in _MOCK_ATTRACTIONS]
+    return {
+        "status": "success",
+        "query": {"location": city},
+        "results": {"data": {"attractions": demo}},
+    }
 
-    # Helper to build a few mock attractions (for fallback/demo)
-    def _mock_attractions(city: str) -> dict[str, Any]:
-        demo = [
-            {
-                "name": f"City Highlights Tour - {city}",
-                "rating": 4.7,
-                "reviews": 1200,
-                "price": {"amount": 35, "currency": "USD"},
-                "duration": "4h",
-                "location": city,
-                "imageUrl": None,
-            },
-            {
-                "name": f"Old Town Walking Tour - {city}",
-                "rating": 4.5,
-                "reviews": 840,
-                "price": {"amount": 20, "currency": "USD"},
-                "duration": "3h",
-                "location": city,
-                "imageUrl": None,
-            },
-        ]
-        return {
-            "status": "success",
-            "query": {"location": city},
-            "results": {"data": {"attractions": demo}},
-        }
 
-    # First, try to resolve an attraction location ID via searchLocation
+# searchAttractions parameters that never change, pre-encoded into a URL template.
+# The id is merged into the URL itself: httpx replaces (not extends) a URL's
+# query string when params= is passed.
+_ATTR_SEARCH_PARAMS: Dict[str, Any] = {
+    "sortBy": "trending",
+    "page": 1,
+    "currency_code": "INR",
+    "languagecode": "en-us",
+}
+_ATTR_SEARCH_URL = httpx.URL(
+    "https://booking-com15.p.rapidapi.com/api/v1/attraction/searchAttractions",
+    params=_ATTR_SEARCH_PARAMS,
+)
+
+
+async def _resolve_attraction_location(location: str, loc_key: Tuple[str, str]) -> Any:
+    """Attraction location id for a city via searchLocation, or None."""
     base_loc = "https://booking-com15.p.rapidapi.com/api/v1/attraction/searchLocation"
-    try:
-        loc_res = await _rapidapi_get(base_loc, {"query": location})
-        if loc_res.get("status") != "success":
-            return _mock_attractions(location)
-        loc_data = loc_res.get("data") or {}
-        root = loc_data.get("data") if isinstance(loc_data, dict) else None
-
-        # According to docs, id can be inside products or destinations
-        candidates = None
-        if isinstance(root, dict):
-            candidates = root.get("products") or root.get("destinations")
-        if candidates is None and isinstance(root, list):
-            candidates = root
-        if not isinstance(candidates, list) or not candidates:
-            return _mock_attractions(location)
+    loc_res = await _rapidapi_get(base_loc, {"query": location})
+    if loc_res.get("status") != "success":
+        return None
+    loc_data = loc_res.get("data") or {}
+    root = loc_data.get("data") if isinstance(loc_data, dict) else None
+
+    # According to docs, id can be inside products or destinations
+    candidates = None
+    if isinstance(root, dict):
+        candidates = root.get("products") or root.get("destinations")
+    if candidates is None and isinstance(root, list):
+        candidates = root
+    if not isinstance(candidates, list) or not candidates:
+        return None
+
+    first = candidates[0]
+    loc_id = first.get("id") or first.get("ufi") or first.get("dest_id")
+    if loc_id:
+        # Ids are as stable as hotel destination ids; outlives the listing cache
+        _cache_set(loc_key, loc_id, ttl=_DEST_TTL_SEC)
+    return loc_id
 
-        first = candidates[0]
-        loc_id = first.get("id") or first.get("ufi") or first.get("dest_id")
+
+async def _fetch_attractions(location: str, cache_key: Tuple[str, str]) -> dict[str, Any]:
+    try:
+        # Resolve the attraction location ID, skipping the round trip when known
+        loc_key = ("attr_loc", cache_key[1])
+        loc_id = _cache_get(loc_key) or await _resolve_attraction_location(location, loc_key)
         if not loc_id:
             return _mock_attractions(location)
 
-        # Now search attractions for that id
-        base_attr = "https://booking-com15.p.rapidapi.com/api/v1/attraction/searchAttractions"
-        params: Dict[str, Any] = {
-            "id": loc_id,
-            "sortBy": "trending",
-            "page": 1,
-            "currency_code": "INR",
-            "languagecode": "en-us",
-        }
-        attr_res = await _rapidapi_get(base_attr, params)
+        # Now search attractions for that id; only the id is encoded per call
+        attr_res = await _rapidapi_get(_ATTR_SEARCH_URL.copy_merge_params({"id": loc_id}))
         if attr_res.get("status") != "success":
             return _mock_attractions(location)
 
         out = {
             "status": "success",
-            "query": params,
+            "query": {"id": loc_id, **_ATTR_SEARCH_PARAMS},
             "results": attr_res.get("data"),
         }
+        # Only live results are cached; mock fallbacks retry upstream next time
+        _cache_set(cache_key, out, ttl=_ATTR_TTL_SEC)
         return out
     except httpx.RequestError:
         return _mock_attractions(location)
@@ -505,6 +727,33 @@ async def search_attractions(
         return _mock_attractions(location)
 
 
+@tool
+async def search_attractions(
+    location: str,
+    interruption_check: Optional[dict] = None
+) -> dict[str, Any]:
+    """Search attractions for a city using Booking.com attractions API.
+
+    Tries the real Booking attractions endpoints and falls back to sample data
+    if the API call fails or returns no attractions, so the UI can always
+    render cards for demos. Live results are cached per normalized city.
+    """
+
+    if interruption_check and interruption_check.get("should_interrupt"):
+        return {
+            "status": "interrupted",
+            "message": "Attraction search was cancelled",
+            "partial_results": interruption_check.get("partial_results", {}),
+        }
+
+    normalized = " ".join(location.split()).lower()
+    cache_key = ("attractions", normalized)
+    cached = _cache_get(cache_key)
+    if cached:
+        return cached
+    return await _single_flight(cache_key, lambda: _fetch_attractions(location, cache_key))
+
+
 @tool
 async def get_attraction_details(
     attraction_id: str,
@@ -522,25 +771,14 @@ async def get_attraction_details(
             "partial_results": interruption_check.get("partial_results", {}),
         }
 
+    attraction_id = attraction_id.strip()
     base_url = "https://booking-com15.p.rapidapi.com/api/v1/attraction/getAttractionDetails"
     params = {
         "id": attraction_id,
         "currency_code": "INR",
         "languagecode": "en-us",
     }
-    try:
-        res = await _rapidapi_get(base_url, params)
-        if res.get("status") != "success":
-            return res
-        return {
-            "status": "success",
-            "query": params,
-            "results": res.get("data"),
-        }
-    except httpx.RequestError as e:
-        return {"status": "error", "message": f"Network error: {e}"}
-    except Exception as e:
-        return {"status": "error", "message": f"Unexpected error: {e}"}
+    return await _cached_rapidapi(("attr_details", attraction_id), base_url, params, _ATTR_DETAILS_TTL_SEC)
 
 
 # Export all tools as a list